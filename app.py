@@ -3,6 +3,16 @@ import os
 from routes import routes_bp
 from models import db, User
 from config import Config
+from auth import init_auth
+from response_cache import init_response_cache
+from events import init_events
+from recommend import init_recommendations
+from group_commit import init_group_commit
+from passwords import init_passwords
+from sqlite_tuning import init_sqlite_tuning, register_sqlite_pragmas
+from db_routing import init_db_routing
+from metrics import init_metrics
+from commands import init_commands
 from flask_migrate import Migrate
 
 
@@ -17,8 +27,19 @@ app = Flask(
 
 app.config.from_object(Config)
 
+init_sqlite_tuning(app)
+init_db_routing(app)
 db.init_app(app)
+register_sqlite_pragmas(app)
+init_auth(app)
+init_passwords(app)
+init_response_cache(app)
+init_events(app)
+init_recommendations(app)
+init_group_commit(app)
+init_metrics(app)
 migrate = Migrate(app, db)
+init_commands(app)
 
 app.register_blueprint(routes_bp)
 
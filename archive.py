@@ -0,0 +1,131 @@
+# archive.py
+"""Архивация закрытых вакансий и старых откликов.
+
+Рабочие таблицы job и application растут с каждым сезоном, хотя почти все
+запросы читают только открытые вакансии и свежие отклики. archive_jobs()
+и archive_applications() переносят старые строки в job_archive и
+application_archive пачками: одна пачка — одна короткая транзакция, так
+что воркеры не ждут блокировку записи всё время архивации.
+
+Архив остаётся доступен через ?include_archived=1 (with_archived()).
+Запуск: flask archive (commands.py).
+"""
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import delete, func, insert, literal, select, text
+
+from models import db, Job, Application, ArchivedJob, ArchivedApplication
+from search import FTS_TABLE
+
+# отклики с окончательным решением; остальные ещё в работе и не архивируются
+FINISHED_APPLICATION_STATUSES = ("rejected", "accepted")
+
+_JOB_COLUMNS = ("id", "title", "description", "job_type", "status", "created_at", "employer_id",
+                "job_rating", "rating_count", "rating_sum", "rating_score")
+_APPLICATION_COLUMNS = ("id", "resume_url", "cover_letter", "status", "applied_at", "student_id",
+                        "job_id", "rating")
+
+
+def include_archived():
+    return request.args.get('include_archived') in ('1', 'true')
+
+
+def with_archived(hot, archived):
+    """UNION ALL рабочей и архивной выборки с одинаковыми столбцами.
+
+    Фильтры и сортировка, наложенные на результат по столбцам рабочей
+    таблицы (Job.created_at, Application.id, ...), SQLAlchemy переносит на
+    объединение, поэтому пагинация и потоковая выдача работают как обычно.
+    """
+    return hot.union_all(archived)
+
+
+def _archive_applications_where(condition, archived_at):
+    moved = select(*(getattr(Application, c) for c in _APPLICATION_COLUMNS),
+                   Job.title, Job.employer_id, literal(archived_at)) \
+        .join(Job, Application.job_id == Job.id).where(condition)
+    db.session.execute(insert(ArchivedApplication).from_select(
+        _APPLICATION_COLUMNS + ("job_title", "employer_id", "archived_at"), moved))
+    db.session.execute(delete(Application).where(condition)
+                       .execution_options(synchronize_session=False))
+
+
+def archive_jobs(older_than, batch_size, dry_run=False):
+    """Переносит закрытые вакансии, созданные раньше older_than, вместе с их откликами.
+
+    Возвращает (вакансий, откликов).
+    """
+    candidates = select(Job.id).where(Job.status == "closed", Job.created_at < older_than)
+    if dry_run:
+        n_jobs = db.session.scalar(select(func.count()).select_from(candidates.subquery()))
+        n_apps = db.session.scalar(select(func.count(Application.id))
+                                   .where(Application.job_id.in_(candidates)))
+        return n_jobs, n_apps
+
+    n_jobs = n_apps = 0
+    while True:
+        ids = db.session.scalars(candidates.order_by(Job.id).limit(batch_size)).all()
+        if not ids:
+            return n_jobs, n_apps
+        archived_at = datetime.utcnow()
+        db.session.execute(insert(ArchivedJob).from_select(
+            _JOB_COLUMNS + ("archived_at",),
+            select(*(getattr(Job, c) for c in _JOB_COLUMNS), literal(archived_at)).where(Job.id.in_(ids))))
+        n_apps += db.session.scalar(select(func.count(Application.id)).where(Application.job_id.in_(ids)))
+        _archive_applications_where(Application.job_id.in_(ids), archived_at)
+        # триггер job_fts_ad сам убирает вакансии из полнотекстового индекса
+        db.session.execute(delete(Job).where(Job.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+        n_jobs += len(ids)
+
+
+def archive_applications(older_than, batch_size, dry_run=False):
+    """Переносит завершённые отклики, поданные раньше older_than, у вакансий, оставшихся в job.
+
+    Агрегаты оценок и счётчики статусов вакансий не меняются: архивные
+    отклики по-прежнему учитываются (и при пересчёте тоже).
+    """
+    candidates = select(Application.id).where(
+        Application.status.in_(FINISHED_APPLICATION_STATUSES), Application.applied_at < older_than)
+    if dry_run:
+        return db.session.scalar(select(func.count()).select_from(candidates.subquery()))
+
+    moved = 0
+    while True:
+        ids = db.session.scalars(candidates.order_by(Application.id).limit(batch_size)).all()
+        if not ids:
+            return moved
+        _archive_applications_where(Application.id.in_(ids), datetime.utcnow())
+        db.session.commit()
+        moved += len(ids)
+
+
+def compact_database(full_vacuum=False):
+    """Возвращает освободившиеся страницы и обновляет статистику планировщика.
+
+    При auto_vacuum=INCREMENTAL свободные страницы отдаются инкрементально,
+    без перестройки файла. Иначе они просто переиспользуются следующими
+    вставками; full_vacuum=True один раз перестраивает базу (VACUUM) и
+    переводит её в режим INCREMENTAL. Возвращает число освобождённых страниц.
+    """
+    if db.engine.dialect.name != "sqlite":
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        return 0
+
+    # VACUUM и PRAGMA auto_vacuum не выполняются внутри транзакции
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        if full_vacuum:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        elif conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            conn.exec_driver_sql("PRAGMA incremental_vacuum")
+        else:
+            free_pages = 0
+        if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).scalar():
+            # после массового удаления сливаем сегменты индекса FTS5
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        conn.exec_driver_sql("ANALYZE")
+    return free_pages
@@ -0,0 +1,91 @@
+# auth.py
+"""Текущий пользователь сессии.
+
+В сессии лежат username, user_id и role. Строка пользователя загружается
+не чаще одного раза за запрос (g.user), а между запросами — из LRU-кэша
+снимков, так что обычный API-вызов не тратит SELECT на авторизацию.
+Кэш локален для процесса; после изменения профиля запись сбрасывается
+invalidate_user(), в остальных воркерах она живёт не дольше USER_CACHE_TTL.
+"""
+from collections import namedtuple
+
+from flask import g, session
+
+from cache import LRUCache
+from models import db, User
+
+# Снимок строки User: безопасно переиспользовать между запросами и сессиями БД
+CachedUser = namedtuple(
+    "CachedUser", "id username role full_name course faculty organization")
+
+user_cache = LRUCache()
+
+
+def init_auth(app):
+    user_cache.configure(maxsize=app.config["USER_CACHE_SIZE"], ttl=app.config["USER_CACHE_TTL"])
+    # контекст приложения может пережить запрос (тесты, CLI) — g.user не должен
+    app.before_request(_forget_current_user)
+
+
+def _forget_current_user():
+    g.pop("user", None)
+
+
+def snapshot(user):
+    return CachedUser(user.id, user.username, user.role, user.full_name,
+                      user.course, user.faculty, user.organization)
+
+
+def remember(user):
+    cached = snapshot(user)
+    user_cache.set(user.id, cached)
+    return cached
+
+
+def login_user(user):
+    session["username"] = user.username
+    session["user_id"] = user.id
+    session["role"] = user.role
+    return remember(user)
+
+
+def logout_user():
+    for key in ("username", "user_id", "role"):
+        session.pop(key, None)
+    _forget_current_user()
+
+
+def invalidate_user(user_id):
+    user_cache.delete(user_id)
+
+
+def current_user():
+    """CachedUser текущей сессии или None."""
+    if "user" not in g:
+        g.user = _load_session_user()
+    return g.user
+
+
+def _load_session_user():
+    username = session.get("username")
+    if username is None:
+        return None
+
+    user_id = session.get("user_id")
+    if user_id is not None:
+        cached = user_cache.get(user_id)
+        # id из старой сессии мог достаться другому пользователю
+        if cached is not None and cached.username == username:
+            return cached
+        user = db.session.get(User, user_id)
+        if user is None or user.username != username:
+            user = User.query.filter_by(username=username).first()
+    else:
+        # сессия выдана до появления user_id — дополняем её
+        user = User.query.filter_by(username=username).first()
+
+    if user is None:
+        return None
+    if user_id != user.id:
+        return login_user(user)
+    return remember(user)
@@ -0,0 +1,978 @@
+# bench.py
+"""Бенчмарки производительности.
+
+Каждый бенчмарк работает на отдельной временной базе SQLite, рабочая
+instance/database.db не затрагивается.
+
+    python bench.py search --sizes 10000 100000 1000000
+    python bench.py bulk --items 1000
+    python bench.py concurrency --processes 4 --requests 200
+    python bench.py routes --threads 4 --requests 200 --output results.json
+    python bench.py compare before.json after.json
+    python bench.py serialize --rows 10000
+    python bench.py export --applications 1000000
+    python bench.py archive --jobs 100000 --applications 1000000
+    python bench.py recommend --jobs 100000
+    python bench.py burst --students 200 --rounds 3
+    python bench.py logins --logins 64 --readers 4
+    python bench.py replica --readers 4 --writers 2 --seconds 10
+    python bench.py dashboard --sizes 10 1000 100000
+    python bench.py facets --jobs 1000000
+
+Данные для бенчмарков генерирует seed.py.
+"""
+import argparse
+import atexit
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from seed import PASSWORD, make_vocabulary, seed_database, seed_jobs
+
+def open_database(path=None):
+    """Направляет приложение на временную базу и возвращает (app, db)."""
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="bench-", suffix=".db")
+        os.close(fd)
+        atexit.register(os.remove, path)
+    os.environ["DATABASE_URL"] = "sqlite:///" + path
+    from app import app
+    from models import db
+    return app, db
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_search(args):
+    """ILIKE против FTS5 на GET /api/jobs?q=... (выборка id подходящих вакансий)."""
+    app, db = open_database()
+    from models import Job
+    from pagination import order_by_keys
+    from search import apply_keyword_filter
+
+    vocabulary = make_vocabulary(5000)
+    # слова разной частоты + префиксный запрос
+    terms = [vocabulary[10], vocabulary[300], vocabulary[3000], vocabulary[300][:4]]
+
+    print(f"{'jobs':>9} {'query':>16} {'rows':>7} {'like, ms':>10} {'fts, ms':>10}")
+    with app.app_context():
+        for size in args.sizes:
+            db.drop_all()
+            db.create_all()
+            seed_jobs(db, size, vocabulary)
+            for term in terms:
+                timings = {}
+                for backend in ("like", "fts"):
+                    app.config["SEARCH_BACKEND"] = backend
+                    query = Job.query.with_entities(Job.id).filter_by(status="open")
+                    timings[backend], rows = timed(lambda: order_by_keys(
+                        *apply_keyword_filter(query, term, [(Job.id, False)])).all(), args.repeat)
+                print(f"{size:>9} {term:>16} {len(rows):>7} "
+                      f"{timings['like']:>10.1f} {timings['fts']:>10.1f}")
+
+
+def bench_facets(args):
+    """Фасеты GET /api/jobs: COUNT на каждое значение против одного GROUP BY (facets.py) и кэша."""
+    app, db = open_database()
+    logging.getLogger("metrics").setLevel(logging.CRITICAL)
+    from sqlalchemy import func
+    from facets import grouped_counts, job_facets
+    from models import Job
+    from search import keyword_criterion
+
+    vocabulary = make_vocabulary(5000)
+    terms = ["", vocabulary[10], vocabulary[300], vocabulary[3000]]
+    with app.app_context():
+        db.create_all()
+        seed_jobs(db, args.jobs, vocabulary)
+        db.session.execute(db.text("UPDATE job SET status = 'closed' WHERE id % 10 = 0"))
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+        statuses = [value for (value,) in db.session.query(Job.status).distinct()]
+        job_types = [value for (value,) in db.session.query(Job.job_type).distinct()]
+
+        def per_value(term):
+            # без фасетов: отдельный COUNT на каждое значение status и job_type
+            criterion = keyword_criterion(term) if term else None
+            counts = {}
+            for column, values, extra in ((Job.status, statuses, None), (Job.job_type, job_types, Job.status == "open")):
+                for value in values:
+                    query = db.session.query(func.count(Job.id)).filter(column == value)
+                    for condition in (extra, criterion):
+                        if condition is not None:
+                            query = query.filter(condition)
+                    counts[value] = query.scalar()
+            return counts
+
+        n_queries = len(statuses) + len(job_types)
+        print(f"{'jobs':>9} {'query':>12} {'matches':>8} {f'{n_queries} COUNT, ms':>13} "
+              f"{'GROUP BY, ms':>13} {'cached, ms':>11}")
+        for term in terms:
+            per_value_ms, _ = timed(lambda: per_value(term), args.repeat)
+            grouped_ms, rows = timed(lambda: grouped_counts(term), args.repeat)
+            cached = "-"
+            if not term:
+                job_facets("", "open", None)  # прогрев кэша
+                cached = f"{timed(lambda: job_facets('', 'open', None), args.repeat)[0]:.3f}"
+            print(f"{args.jobs:>9} {term or '(все)':>12} {sum(n for _, _, n in rows):>8} "
+                  f"{per_value_ms:>13.1f} {grouped_ms:>13.1f} {cached:>11}")
+
+
+def login(client, username, role):
+    client.post("/register", data={"username": username, "password": "123", "role": role})
+    client.post("/login", data={"username": username, "password": "123"})
+
+
+def bench_bulk(args):
+    """Поштучные POST /api/jobs и PUT /api/applications/<id> против bulk-эндпоинтов."""
+    app, db = open_database()
+    from sqlalchemy import insert
+    from models import Application
+
+    with app.app_context():
+        db.create_all()
+    employer, student = app.test_client(), app.test_client()
+    login(employer, "bench-employer", "employer")
+    login(student, "bench-student", "student")
+    jobs = [{"title": f"Вакансия {i}", "description": "Описание " * 40} for i in range(args.items)]
+
+    def throughput(label, fn):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<36} {elapsed * 1000:>9.0f} ms {args.items / elapsed:>10.0f} items/s")
+
+    throughput("POST /api/jobs x N", lambda: [employer.post("/api/jobs", json=job) for job in jobs])
+    resp = {}
+    throughput("POST /api/jobs/bulk", lambda: resp.update(employer.post("/api/jobs/bulk", json=jobs).get_json()))
+
+    job_ids = [result["id"] for result in resp["results"]]
+    with app.app_context():
+        student_id = db.session.execute(db.text("SELECT id FROM user WHERE username = 'bench-student'")).scalar()
+        app_ids = db.session.scalars(insert(Application).returning(Application.id, sort_by_parameter_order=True),
+                                     [{"student_id": student_id, "job_id": job_id} for job_id in job_ids]).all()
+        db.session.commit()
+
+    throughput("PUT /api/applications/<id> x N", lambda: [
+        employer.put(f"/api/applications/{app_id}", json={"status": "in_review"}) for app_id in app_ids])
+    throughput("PUT /api/applications/bulk", lambda: employer.put(
+        "/api/applications/bulk", json=[{"id": app_id, "status": "invited"} for app_id in app_ids]))
+
+
+def bench_serialize(args):
+    """Стоимость сериализации списка вакансий: ORM + словарь вручную + jsonify против Projection."""
+    app, db = open_database()
+    from sqlalchemy.orm import joinedload
+    from models import Job
+    from serializers import JOB, Employer, dumps, orjson
+
+    def orm_dicts():
+        jobs = Job.query.options(joinedload(Job.employer)).order_by(Job.id).all()
+        return [{
+            'id': job.id,
+            'title': job.title,
+            'description': job.description,
+            'job_type': job.job_type,
+            'status': job.status,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'rating': job.job_rating,
+            'rating_count': job.rating_count,
+            'employer': job.employer.username if job.employer else None,
+        } for job in jobs]
+
+    def projected_rows():
+        return db.session.query(*JOB.columns).outerjoin(Employer, Job.employer_id == Employer.id) \
+            .order_by(Job.id).all()
+
+    with app.app_context():
+        db.create_all()
+        seed_jobs(db, args.rows, make_vocabulary(5000))
+        print(f"JSON: {'orjson' if orjson is not None else 'json (stdlib)'}, rows: {args.rows}")
+        print(f"{'variant':<40} {'fetch, ms':>10} {'dicts, ms':>10} {'encode, ms':>11} {'total, ms':>10}")
+
+        # в "было" выборка ORM и сборка словарей неразделимы: атрибуты грузятся лениво
+        fetch_before, dicts = timed(lambda: (db.session.expunge_all(), orm_dicts())[1], args.repeat)
+        encode_before, _ = timed(lambda: app.json.response(dicts).get_data(), args.repeat)
+        fetch_after, rows = timed(projected_rows, args.repeat)
+        dicts_after, dicts = timed(lambda: JOB.serialize(rows), args.repeat)
+        encode_after, _ = timed(lambda: dumps(dicts), args.repeat)
+
+        for label, fetch, build, encode in (
+                ("ORM + dict literal + jsonify", fetch_before, None, encode_before),
+                ("Projection + compiled to_dict + dumps", fetch_after, dicts_after, encode_after)):
+            total = fetch + (build or 0) + encode
+            build_cell = f"{build:>10.1f}" if build is not None else f"{'(fetch)':>10}"
+            print(f"{label:<40} {fetch:>10.1f} {build_cell} {encode:>11.1f} {total:>10.1f}")
+
+
+def bench_export(args):
+    """GET /api/applications/export: время до первого байта, скорость и пик памяти Python."""
+    import tracemalloc
+    app, db = open_database(args.db)
+
+    with app.app_context():
+        if not args.db:
+            db.create_all()
+            # один работодатель — все отклики попадают в его выгрузку
+            seed_database(db, args.users, args.jobs, args.applications, employer_share=0)
+        employer_id, employer = db.session.execute(db.text(
+            "SELECT id, username FROM user WHERE role = 'employer' ORDER BY id LIMIT 1")).one()
+        n_rows = db.session.execute(db.text(
+            "SELECT count(*) FROM application JOIN job ON job.id = application.job_id "
+            "WHERE job.employer_id = :id"), {"id": employer_id}).scalar()
+    client = app.test_client()
+    login_seeded(client, employer)
+
+    def export(fmt, gzip):
+        headers = {"Accept-Encoding": "gzip"} if gzip else {}
+        started = time.perf_counter()
+        resp = client.get(f"/api/applications/export?format={fmt}", headers=headers, buffered=False)
+        first_byte, size, chunks = None, 0, 0
+        for chunk in resp.response:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+            chunks += 1
+        resp.close()
+        return first_byte, time.perf_counter() - started, size, chunks
+
+    print(f"rows: {n_rows}")
+    print(f"{'format':<12} {'first byte, ms':>15} {'total, s':>9} {'rows/s':>9} {'MB':>8} "
+          f"{'chunks':>7} {'peak, MB':>9}")
+    for fmt, gzip in (("csv", False), ("csv", True), ("ndjson", False), ("ndjson", True)):
+        first_byte, total, size, chunks = export(fmt, gzip)
+        # отдельный прогон под tracemalloc: он сам замедляет выгрузку в разы
+        tracemalloc.start()
+        export(fmt, gzip)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        label = fmt + (" + gzip" if gzip else "")
+        print(f"{label:<12} {first_byte * 1000:>15.1f} {total:>9.1f} {n_rows / total:>9.0f} "
+              f"{size / 2 ** 20:>8.1f} {chunks:>7} {peak / 2 ** 20:>9.1f}")
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+
+def _concurrency_setup(db_path, tuned, n_jobs):
+    os.environ["SQLITE_TUNED"] = "1" if tuned else "0"
+    app, db = open_database(db_path)
+    with app.app_context():
+        db.create_all()
+    employer = app.test_client()
+    login(employer, "bench-employer", "employer")
+    employer.post("/api/jobs/bulk", json=[{"title": f"Вакансия {i}", "description": "Описание"}
+                                          for i in range(n_jobs)])
+
+
+def _concurrency_worker(db_path, tuned, worker, n_requests, results):
+    """Отдельный процесс = отдельный воркер gunicorn со своим пулом соединений."""
+    os.environ["SQLITE_TUNED"] = "1" if tuned else "0"
+    app, db = open_database(db_path)
+    # без профиля — поведение до него: ни повторов, ни busy_timeout сверх стандартного
+    app.config["WRITE_RETRY_ATTEMPTS"] = app.config["WRITE_RETRY_ATTEMPTS"] if tuned else 0
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    client = app.test_client()
+    login(client, f"bench-student-{worker}", "student")
+
+    statuses, latencies = {}, []
+    for job_id in range(1, n_requests + 1):
+        for method, url, payload in (("post", f"/api/jobs/{job_id}/apply", {"resume_url": "r"}),
+                                     ("post", f"/api/jobs/{job_id}/rate", {"rating": 1 + job_id % 5}),
+                                     ("get", "/api/applications?limit=20", None)):
+            started = time.perf_counter()
+            status = getattr(client, method)(url, json=payload).status_code
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+    results.put((statuses, latencies))
+
+
+def bench_concurrency(args):
+    """Конкурентные записи из нескольких процессов в один файл SQLite: по умолчанию и SQLITE_TUNED=1."""
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'profile':<8} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50, ms':>8} {'p99, ms':>8}")
+    for tuned in (False, True):
+        fd, db_path = tempfile.mkstemp(prefix="bench-", suffix=".db")
+        os.close(fd)
+        setup = ctx.Process(target=_concurrency_setup, args=(db_path, tuned, args.requests))
+        setup.start()
+        setup.join()
+
+        results = ctx.Queue()
+        workers = [ctx.Process(target=_concurrency_worker, args=(db_path, tuned, i, args.requests, results))
+                   for i in range(args.processes)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+        statuses, latencies = {}, []
+        for worker_statuses, worker_latencies in collected:
+            for status, count in worker_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            latencies += worker_latencies
+        errors = sum(count for status, count in statuses.items() if status >= 500)
+        print(f"{'tuned' if tuned else 'default':<8} {len(latencies):>9} {errors:>7} "
+              f"{len(latencies) / elapsed:>8.0f} {percentile(latencies, 50):>8.1f} "
+              f"{percentile(latencies, 99):>8.1f}")
+
+
+# --- нагрузочный прогон всех маршрутов routes.py ---------------------------
+
+# role: под кем выполняется запрос; build(ctx, i) -> (method, url, json)
+Endpoint = namedtuple("Endpoint", "name role build weight")
+
+
+def route_endpoints():
+    """По сценарию на каждый маршрут routes.py (страницы с шаблонами не входят).
+
+    weight < 1 — тяжёлые запросы (полные выгрузки), их гоняется меньше.
+    """
+    def nth(items, i):
+        return items[i % len(items)]
+
+    return [
+        Endpoint("GET /api/jobs", "anon", lambda c, i: ("get", "/api/jobs", None), 0.05),
+        Endpoint("GET /api/jobs?job_type", "anon", lambda c, i: ("get", "/api/jobs?job_type=practice&limit=50", None), 1),
+        Endpoint("GET /api/jobs?q", "anon", lambda c, i: ("get", f"/api/jobs?q={nth(c['keywords'], i)}&limit=50", None), 1),
+        Endpoint("GET /api/jobs?limit&cursor", "anon", lambda c, i: ("get", "/api/jobs?limit=50" + (
+            f"&cursor={c['cursor']}" if i % 2 else ""), None), 1),
+        Endpoint("GET /api/jobs?stream", "anon", lambda c, i: ("get", "/api/jobs?stream=1&job_type=job", None), 0.05),
+        Endpoint("GET /api/jobs/top", "anon", lambda c, i: ("get", "/api/jobs/top?limit=20", None), 1),
+        Endpoint("GET /api/jobs/<id>", "anon", lambda c, i: ("get", f"/api/jobs/{nth(c['job_ids'], i)}", None), 1),
+        Endpoint("POST /api/jobs", "employer", lambda c, i: ("post", "/api/jobs", {
+            "title": f"Нагрузочная вакансия {i}", "description": "Описание " * 60}), 1),
+        Endpoint("POST /api/jobs/bulk", "employer", lambda c, i: ("post", "/api/jobs/bulk", [{
+            "title": f"Пакет {i}-{k}", "description": "Описание " * 60} for k in range(50)]), 0.2),
+        Endpoint("PUT /api/jobs/<id>", "employer", lambda c, i: ("put", f"/api/jobs/{nth(c['employer_job_ids'], i)}", {
+            "description": f"Обновлённое описание {i}"}), 1),
+        Endpoint("DELETE /api/jobs/<id>", "employer", lambda c, i: ("delete", f"/api/jobs/{c['disposable_job_ids'].pop()}", None), 1),
+        Endpoint("POST /api/jobs/<id>/apply", "fresh_student", lambda c, i: ("post", f"/api/jobs/{nth(c['job_ids'], i)}/apply", {
+            "resume_url": "https://cv.example/bench", "cover_letter": "Здравствуйте! " * 40}), 1),
+        Endpoint("GET /api/applications (student)", "student", lambda c, i: ("get", "/api/applications", None), 1),
+        Endpoint("GET /api/applications (employer)", "employer", lambda c, i: ("get", "/api/applications?limit=50", None), 1),
+        Endpoint("PUT /api/applications/<id>", "employer", lambda c, i: ("put", f"/api/applications/{nth(c['employer_app_ids'], i)}", {
+            "status": nth(["in_review", "invited", "rejected"], i)}), 1),
+        Endpoint("PUT /api/applications/bulk", "employer", lambda c, i: ("put", "/api/applications/bulk", [
+            {"id": app_id, "status": "in_review"} for app_id in c["employer_app_ids"][:200]]), 0.2),
+        Endpoint("POST /api/jobs/<id>/rate", "student", lambda c, i: ("post", f"/api/jobs/{nth(c['job_ids'], i)}/rate", {
+            "rating": 1 + i % 5}), 1),
+        Endpoint("POST /api/rate/<id>", "student", lambda c, i: ("post", f"/api/rate/{nth(c['student_app_ids'], i)}", {
+            "rating": 1 + i % 5}), 1),
+        Endpoint("GET /api/profile", "student", lambda c, i: ("get", "/api/profile", None), 1),
+        Endpoint("PUT /api/profile", "student", lambda c, i: ("put", "/api/profile", {"course": str(1 + i % 6)}), 1),
+        Endpoint("POST /register", "anon", lambda c, i: ("post_form", "/register", {
+            "username": f"bench-{c['run']}-{i}", "password": PASSWORD, "role": "student"}), 0.2),
+        Endpoint("POST /login", "anon", lambda c, i: ("post_form", "/login", {
+            "username": c["student"], "password": PASSWORD}), 0.2),
+        Endpoint("GET /logout", "anon", lambda c, i: ("get", "/logout", None), 1),
+        Endpoint("GET /api/stats/cache", "anon", lambda c, i: ("get", "/api/stats/cache", None), 1),
+    ]
+
+
+def login_seeded(client, username):
+    client.post("/login", data={"username": username, "password": PASSWORD})
+
+
+def prepare_context(app, db, n_requests):
+    """Выбирает из базы пользователей и id, на которых гоняются запросы."""
+    from models import User, Job, Application
+
+    with app.app_context():
+        employer_id = db.session.query(Job.employer_id).group_by(Job.employer_id) \
+            .order_by(db.func.count().desc()).limit(1).scalar()
+        student_id = db.session.query(Application.student_id).group_by(Application.student_id) \
+            .order_by(db.func.count().desc()).limit(1).scalar()
+        context = {
+            "run": datetime.now().strftime("%H%M%S"),
+            "employer": db.session.get(User, employer_id).username,
+            "student": db.session.get(User, student_id).username,
+            "job_ids": [row[0] for row in db.session.query(Job.id).filter(Job.status == "open").limit(5000)],
+            "employer_job_ids": [row[0] for row in db.session.query(Job.id).filter(Job.employer_id == employer_id)],
+            "employer_app_ids": [row[0] for row in db.session.query(Application.id).join(Job)
+                                 .filter(Job.employer_id == employer_id).limit(5000)],
+            "student_app_ids": [row[0] for row in db.session.query(Application.id)
+                                .filter(Application.student_id == student_id)],
+            "keywords": [title.split()[0][:5] for (title,) in db.session.query(Job.title).limit(50)],
+        }
+
+    client = app.test_client()
+    page = client.get("/api/jobs?limit=50").get_json()
+    context["cursor"] = page["next_cursor"] or ""
+    login_seeded(client, context["employer"])
+    resp = client.post("/api/jobs/bulk", json=[{"title": f"Удаляемая {i}", "description": "d"}
+                                               for i in range(n_requests)]).get_json()
+    context["disposable_job_ids"] = [result["id"] for result in resp["results"]]
+    return context
+
+
+def run_endpoint(app, context, endpoint, n_requests, n_threads):
+    local = threading.local()
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+
+    def client_for(role):
+        clients = local.__dict__.setdefault("clients", {})
+        if role not in clients:
+            client = clients[role] = app.test_client()
+            if role in ("student", "employer"):
+                login_seeded(client, context[role])
+            elif role == "fresh_student":
+                login(client, f"bench-{context['run']}-{endpoint.name[-6:]}-{threading.get_ident()}", "student")
+        return clients[role]
+
+    def one_request(_):
+        client = client_for(endpoint.role)
+        method, url, payload = endpoint.build(context, next(counter))
+        started = time.perf_counter()
+        if method == "post_form":
+            status = client.post(url, data=payload).status_code
+        else:
+            response = getattr(client, method)(url, json=payload)
+            response.get_data()  # дочитываем потоковые ответы
+            status = response.status_code
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    with ThreadPoolExecutor(n_threads) as pool:
+        # клиенты логинятся до замера: хэширование пароля не должно попадать в цифры
+        list(pool.map(lambda _: client_for(endpoint.role), range(n_threads)))
+        started = time.perf_counter()
+        list(pool.map(one_request, range(n_requests)))
+        wall = time.perf_counter() - started
+
+    return {
+        "requests": n_requests,
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(n_requests / wall, 1),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def bench_routes(args):
+    """Пропускная способность и p50/p95/p99 по каждому маршруту, результаты — в JSON."""
+    if args.db:
+        app, db = open_database(os.path.abspath(args.db))
+    else:
+        app, db = open_database()
+        with app.app_context():
+            db.create_all()
+            seed_database(db, args.users, args.jobs, args.applications)
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    context = prepare_context(app, db, args.requests)
+
+    selected = [e for e in route_endpoints() if not args.only or any(o in e.name for o in args.only)]
+    results = {}
+    print(f"{'endpoint':<36} {'req':>5} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint in selected:
+        n_requests = max(3, int(args.requests * endpoint.weight))
+        result = results[endpoint.name] = run_endpoint(app, context, endpoint, n_requests, args.threads)
+        print(f"{endpoint.name:<36} {result['requests']:>5} {result['errors']:>4} "
+              f"{result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+              f"{result['p99_ms']:>8.1f}")
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "threads": args.threads,
+            "database": args.db or {"users": args.users, "jobs": args.jobs, "applications": args.applications},
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nрезультаты сохранены в {args.output}")
+
+
+def bench_recommend(args):
+    """Индекс рекомендаций: построение, top-K на профиль, инкрементальные вставки."""
+    app, db = open_database()
+    import recommend
+    from models import Job
+
+    vocabulary = make_vocabulary(5000)
+    with app.app_context():
+        db.create_all()
+        seed_jobs(db, args.jobs, vocabulary)
+        index = recommend.index
+        started = time.perf_counter()
+        index.build(recommend.open_job_rows())
+        build_s = time.perf_counter() - started
+        texts = db.session.query(Job.title, Job.description).limit(2000).all()
+
+    stats = index.stats()
+    matrix_mb = (index.matrix.data.nbytes + index.matrix.indices.nbytes + index.matrix.indptr.nbytes) / 2 ** 20
+    print(f"jobs: {stats['jobs']}, nnz: {stats['nnz']}, matrix: {matrix_mb:.1f} MB, build: {build_s:.1f} s")
+
+    rnd = random.Random(0)
+    for history in args.history:
+        profiles = []
+        for _ in range(args.queries):
+            counts = {}
+            for title, description in rnd.sample(texts, history):
+                index.term_counts(title, description, counts)
+            profiles.append(counts)
+        samples = []
+        for counts in profiles:
+            started = time.perf_counter()
+            index.recommend(counts, args.k, preferred_type="internship")
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"top-{args.k}, профиль из {history:>2} вакансий ({statistics.mean(map(len, profiles)):>5.0f} термов): "
+              f"p50 {percentile(samples, 50):.2f} ms, p95 {percentile(samples, 95):.2f} ms")
+
+    samples = []
+    for i in range(recommend.MERGE_THRESHOLD):
+        title, description = texts[i % len(texts)]
+        started = time.perf_counter()
+        index.upsert(10 ** 9 + i, title, description, "internship")
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"upsert x {len(samples)}: p50 {percentile(samples, 50):.3f} ms, "
+          f"max (слияние pending) {max(samples):.1f} ms")
+
+
+def bench_burst(args):
+    """Всплеск откликов на одну вакансию: обычный commit против группового (group_commit.py)."""
+    os.environ["SQLITE_TUNED"] = "1" if args.tuned else "0"
+    app, db = open_database()
+    import group_commit
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    with app.app_context():
+        db.create_all()
+        seed_database(db, args.students + 1, 1, 0, employer_share=0)
+        students = [name for (name,) in db.session.execute(db.text(
+            "SELECT username FROM user WHERE role = 'student' ORDER BY id"))]
+
+    employer = app.test_client()
+    login_seeded(employer, "employer0")
+    clients = []
+    for name in students:
+        client = app.test_client()
+        login_seeded(client, name)
+        clients.append(client)
+
+    def burst(job_id):
+        barrier = threading.Barrier(len(clients))
+
+        def one(client):
+            barrier.wait()
+            started = time.perf_counter()
+            status = client.post(f"/api/jobs/{job_id}/apply", json={
+                "resume_url": "https://cv.example/burst", "cover_letter": "Здравствуйте! " * 40}).status_code
+            return status, (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(len(clients)) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(one, clients))
+            wall = time.perf_counter() - started
+        return results, wall
+
+    print(f"{'mode':<8} {'round':>5} {'ok':>5} {'err':>5} {'commits':>8} {'rows/s':>8} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8}")
+    for mode in ("direct", "group"):
+        app.config["GROUP_COMMIT"] = mode == "group"
+        group_commit.init_group_commit(app)
+        for round_no in range(args.rounds):
+            job_id = employer.post("/api/jobs", json={"title": f"Популярная {mode} {round_no}",
+                                                      "description": "Все хотят сюда"}).get_json()["id"]
+            batches_before = group_commit.writer.batches if group_commit.writer else 0
+            results, wall = burst(job_id)
+            ok = sum(1 for status, _ in results if status == 201)
+            commits = group_commit.writer.batches - batches_before if group_commit.writer else ok
+            latencies = [elapsed for _, elapsed in results]
+            print(f"{mode:<8} {round_no:>5} {ok:>5} {len(results) - ok:>5} {commits:>8} {ok / wall:>8.0f} "
+                  f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+                  f"{percentile(latencies, 99):>8.1f}")
+    app.config["GROUP_COMMIT"] = False
+    group_commit.init_group_commit(app)
+
+
+def bench_logins(args):
+    """Шторм входов рядом с дешёвыми чтениями: хэширование без ограничения и через пул."""
+    import passwords
+    app, db = open_database()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    with app.app_context():
+        db.create_all()
+        seed_database(db, args.logins + 1, 200, 0, employer_share=0)
+        students = [name for (name,) in db.session.execute(db.text(
+            "SELECT username FROM user WHERE role = 'student' ORDER BY id"))]
+    reader = app.test_client()
+    login_seeded(reader, students[-1])
+
+    def storm():
+        stop = threading.Event()
+        read_latencies = []
+
+        def read():
+            while not stop.is_set():
+                started = time.perf_counter()
+                reader.get("/api/jobs?limit=20")
+                read_latencies.append((time.perf_counter() - started) * 1000)
+
+        def login(name):
+            started = time.perf_counter()
+            status = app.test_client().post("/login", data={"username": name, "password": PASSWORD}).status_code
+            return status, (time.perf_counter() - started) * 1000
+
+        readers = [threading.Thread(target=read) for _ in range(args.readers)]
+        for thread in readers:
+            thread.start()
+        with ThreadPoolExecutor(args.logins) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(login, students[:args.logins]))
+            wall = time.perf_counter() - started
+        stop.set()
+        for thread in readers:
+            thread.join()
+        return results, wall, read_latencies
+
+    print(f"{'mode':<9} {'ok':>5} {'429':>5} {'logins/s':>9} {'login p95':>10} "
+          f"{'reads':>6} {'read p50':>9} {'read p95':>9}")
+    for mode, concurrency in (("uncapped", args.logins), ("capped", app.config["PASSWORD_HASH_CONCURRENCY"])):
+        app.config["PASSWORD_HASH_CONCURRENCY"] = concurrency
+        passwords.init_passwords(app)
+        results, wall, reads = storm()
+        ok = sum(1 for status, _ in results if status == 302)
+        # 429 считаем по самому пулу: шаблоны форм живут во фронтенде и здесь могут не рендериться
+        busy = passwords.hasher.rejected
+        print(f"{mode:<9} {ok:>5} {busy:>5} {ok / wall:>9.1f} "
+              f"{percentile([elapsed for _, elapsed in results], 95):>10.1f} {len(reads):>6} "
+              f"{percentile(reads, 50):>9.1f} {percentile(reads, 95):>9.1f}")
+
+
+def bench_replica(args):
+    """Смешанная нагрузка чтение/запись: всё в основной базе против чтений с реплики (db_routing.py)."""
+    from db_routing import REPLICA_BIND, ReplicaSync, sqlite_path
+    from models import Job, Application
+
+    os.environ["SQLITE_TUNED"] = "1" if args.tuned else "0"
+    fd, replica_path = tempfile.mkstemp(prefix="bench-replica-", suffix=".db")
+    os.close(fd)
+    atexit.register(os.remove, replica_path)
+    os.environ["READ_DATABASE_URL"] = "sqlite:///" + replica_path
+    app, db = open_database()
+    for name in ("app", "metrics"):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+    with app.app_context():
+        db.create_all()
+        seed_database(db, args.users, args.jobs, args.applications)
+        employers = [name for (name,) in db.session.execute(db.text(
+            "SELECT username FROM user WHERE role = 'employer' AND id IN (SELECT employer_id FROM job) "
+            "ORDER BY id LIMIT :n"), {"n": args.readers + args.writers})]
+        app_ids = {}
+        for name in employers:
+            app_ids[name] = [row[0] for row in db.session.query(Application.id).join(Job)
+                             .join(Job.employer).filter_by(username=name).limit(1000)]
+        replica_engine = db.engines[REPLICA_BIND]
+        primary_path = sqlite_path(str(db.engine.url))
+
+    sync = ReplicaSync(primary_path, replica_path, args.sync_interval)
+    sync.sync_once(force=True)
+    sync.start()
+
+    def run(clients_and_roles):
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies = {"read": [], "write": []}
+        errors = [0]
+
+        def loop(client, role, ids):
+            rng = random.Random(threading.get_ident())
+            while not stop.is_set():
+                started = time.perf_counter()
+                if role == "write":
+                    status = client.put(f"/api/applications/{rng.choice(ids)}", json={
+                        "status": rng.choice(("in_review", "invited", "rejected"))}).status_code
+                else:
+                    response = client.get("/api/applications")
+                    response.get_data()
+                    status = response.status_code
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies[role].append(elapsed)
+                    errors[0] += status >= 500
+
+        threads = [threading.Thread(target=loop, args=item) for item in clients_and_roles]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0]
+
+    clients = []
+    for i, name in enumerate(employers):
+        client = app.test_client()
+        login_seeded(client, name)
+        clients.append((client, "read" if i < args.readers else "write", app_ids[name]))
+
+    print(f"{'reads from':<11} {'reads/s':>8} {'writes/s':>9} {'read p95':>9} {'write p95':>10} "
+          f"{'errors':>7} {'syncs':>6}")
+    for mode in ("primary", "replica"):
+        with app.app_context():
+            if mode == "primary":
+                db.engines.pop(REPLICA_BIND)
+            else:
+                db.engines[REPLICA_BIND] = replica_engine
+        syncs_before = sync.syncs
+        latencies, errors = run(clients)
+        print(f"{mode:<11} {len(latencies['read']) / args.seconds:>8.1f} "
+              f"{len(latencies['write']) / args.seconds:>9.1f} {percentile(latencies['read'], 95):>9.1f} "
+              f"{percentile(latencies['write'], 95):>10.1f} {errors:>7} {sync.syncs - syncs_before:>6}")
+    sync.stop()
+
+
+def bench_dashboard(args):
+    """GET /api/dashboard по счётчикам против подсчёта на клиенте по GET /api/applications."""
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from dashboard import APPLICATION_STATUSES, recompute_status_counts
+    from models import User, Job, Application
+
+    app, db = open_database()
+    for name in ("app", "metrics"):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+    rnd = random.Random(0)
+    password = generate_password_hash(PASSWORD)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [{"username": f"student{i}", "password": password, "role": "student"}
+                                          for i in range(max(args.sizes))])
+        db.session.commit()
+
+    print(f"{'applications':>12} {'dashboard ms':>13} {'client count ms':>16}")
+    for size in args.sizes:
+        employer = f"employer{size}"
+        with app.app_context():
+            user = User(username=employer, password=password, role="employer")
+            db.session.add(user)
+            db.session.flush()
+            job = Job(title=f"Вакансия на {size} откликов", description="d", employer_id=user.id)
+            db.session.add(job)
+            db.session.flush()
+            db.session.execute(insert(Application), [
+                {"student_id": i + 1, "job_id": job.id, "resume_url": "https://cv.example/r",
+                 "status": rnd.choice(APPLICATION_STATUSES)} for i in range(size)])
+            recompute_status_counts()
+            db.session.commit()
+
+        client = app.test_client()
+        login_seeded(client, employer)
+        dashboard_ms, _ = timed(lambda: client.get("/api/dashboard").get_data(), args.repeat)
+
+        def client_count():
+            counts = {}
+            for item in client.get("/api/applications").get_json():
+                counts[item["status"]] = counts.get(item["status"], 0) + 1
+            return counts
+
+        count_ms, _ = timed(client_count, max(1, args.repeat // 10) if size > 10000 else args.repeat)
+        print(f"{size:>12} {dashboard_ms:>13.2f} {count_ms:>16.1f}")
+
+
+ARCHIVE_HOT_PATHS = ("GET /api/jobs?job_type", "GET /api/jobs?q", "GET /api/jobs?limit&cursor",
+                     "GET /api/jobs/top", "GET /api/jobs/<id>", "POST /api/jobs/<id>/apply",
+                     "GET /api/applications (student)", "GET /api/applications (employer)",
+                     "PUT /api/applications/<id>")
+
+
+def bench_archive(args):
+    """Задержки горячих маршрутов до и после flask archive на одной и той же базе."""
+    from datetime import timedelta
+    from archive import archive_applications, archive_jobs, compact_database
+    from response_cache import response_cache
+
+    app, db = open_database()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    with app.app_context():
+        db.create_all()
+        seed_database(db, args.users, args.jobs, args.applications, closed_share=args.closed_share)
+    endpoints = [e for e in route_endpoints() if e.name in ARCHIVE_HOT_PATHS]
+
+    def measure():
+        response_cache.clear()
+        context = prepare_context(app, db, args.requests)
+        return {e.name: run_endpoint(app, context, e, args.requests, args.threads) for e in endpoints}
+
+    before = measure()
+    with app.app_context():
+        now = datetime.utcnow()
+        started = time.perf_counter()
+        n_jobs, n_job_apps = archive_jobs(now - timedelta(days=args.jobs_days), app.config["ARCHIVE_BATCH_SIZE"])
+        n_apps = archive_applications(now - timedelta(days=args.applications_days),
+                                      app.config["ARCHIVE_BATCH_SIZE"])
+        compact_database()
+        elapsed = time.perf_counter() - started
+    print(f"архивировано за {elapsed:.1f} s: вакансий {n_jobs}, откликов {n_job_apps + n_apps}\n")
+    after = measure()
+
+    print(f"{'endpoint':<36} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10}")
+    for name in before:
+        b, a = before[name], after[name]
+        print(f"{name:<36} {b['p50_ms']:>11.1f} {a['p50_ms']:>10.1f} {b['p95_ms']:>11.1f} {a['p95_ms']:>10.1f}")
+
+
+def bench_compare(args):
+    """Сравнивает два JSON-отчёта bench.py routes (например, до и после коммита)."""
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'endpoint':<36} {'p50 ms':>17} {'p99 ms':>17} {'req/s':>17}")
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        cells = []
+        for key in ("p50_ms", "p99_ms", "throughput_rps"):
+            change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f"{new[key]:>9.1f} {change:>+6.0f}%")
+        print(f"{name:<36} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    search = sub.add_parser("search", help="полнотекстовый поиск против ILIKE")
+    search.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    search.add_argument("--repeat", type=int, default=5)
+    search.set_defaults(func=bench_search)
+
+    bulk = sub.add_parser("bulk", help="bulk-эндпоинты против поштучных запросов")
+    bulk.add_argument("--items", type=int, default=1000)
+    bulk.set_defaults(func=bench_bulk)
+
+    concurrency = sub.add_parser("concurrency", help="конкурентные записи из нескольких процессов")
+    concurrency.add_argument("--processes", type=int, default=4)
+    concurrency.add_argument("--requests", type=int, default=200)
+    concurrency.set_defaults(func=bench_concurrency)
+
+    routes = sub.add_parser("routes", help="все маршруты: пропускная способность и перцентили")
+    routes.add_argument("--db", help="готовая база от seed.py (иначе сгенерируется временная)")
+    routes.add_argument("--users", type=int, default=2000)
+    routes.add_argument("--jobs", type=int, default=5000)
+    routes.add_argument("--applications", type=int, default=50000)
+    routes.add_argument("--threads", type=int, default=4)
+    routes.add_argument("--requests", type=int, default=200, help="запросов на маршрут")
+    routes.add_argument("--only", nargs="*", help="подстроки имён маршрутов")
+    routes.add_argument("--output", help="файл JSON для сравнения прогонов")
+    routes.set_defaults(func=bench_routes)
+
+    compare = sub.add_parser("compare", help="сравнить два JSON-отчёта routes")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    compare.set_defaults(func=bench_compare)
+
+    serialize = sub.add_parser("serialize", help="сериализация списка вакансий: до и после serializers.py")
+    serialize.add_argument("--rows", type=int, default=10000)
+    serialize.add_argument("--repeat", type=int, default=5)
+    serialize.set_defaults(func=bench_serialize)
+
+    export = sub.add_parser("export", help="потоковая выгрузка откликов: скорость и память")
+    export.add_argument("--db", help="готовая база от seed.py (иначе сгенерируется временная)")
+    export.add_argument("--users", type=int, default=20000)
+    export.add_argument("--jobs", type=int, default=20000)
+    export.add_argument("--applications", type=int, default=1000000)
+    export.set_defaults(func=bench_export)
+
+    archive = sub.add_parser("archive", help="горячие маршруты до и после архивации")
+    archive.add_argument("--users", type=int, default=5000)
+    archive.add_argument("--jobs", type=int, default=50000)
+    archive.add_argument("--applications", type=int, default=500000)
+    archive.add_argument("--closed-share", type=float, default=0.6, help="доля закрытых вакансий")
+    archive.add_argument("--jobs-days", type=int, default=180)
+    archive.add_argument("--applications-days", type=int, default=180)
+    archive.add_argument("--threads", type=int, default=4)
+    archive.add_argument("--requests", type=int, default=200, help="запросов на маршрут")
+    archive.set_defaults(func=bench_archive)
+
+    recommendations = sub.add_parser("recommend", help="рекомендации: построение индекса и top-K")
+    recommendations.add_argument("--jobs", type=int, default=100000)
+    recommendations.add_argument("--queries", type=int, default=200)
+    recommendations.add_argument("--history", type=int, nargs="+", default=[1, 5, 20])
+    recommendations.add_argument("--k", type=int, default=20)
+    recommendations.set_defaults(func=bench_recommend)
+
+    burst = sub.add_parser("burst", help="всплеск откликов: обычный и групповой commit")
+    burst.add_argument("--students", type=int, default=200)
+    burst.add_argument("--rounds", type=int, default=3)
+    burst.add_argument("--tuned", action="store_true", help="профиль SQLITE_TUNED=1 (WAL)")
+    burst.set_defaults(func=bench_burst)
+
+    logins = sub.add_parser("logins", help="шторм входов: задержка дешёвых чтений с пулом хэширования и без")
+    logins.add_argument("--logins", type=int, default=64)
+    logins.add_argument("--readers", type=int, default=4)
+    logins.set_defaults(func=bench_logins)
+
+    replica = sub.add_parser("replica", help="чтение с реплики: смешанная нагрузка чтение/запись")
+    replica.add_argument("--users", type=int, default=2000)
+    replica.add_argument("--jobs", type=int, default=5000)
+    replica.add_argument("--applications", type=int, default=50000)
+    replica.add_argument("--readers", type=int, default=4)
+    replica.add_argument("--writers", type=int, default=2)
+    replica.add_argument("--seconds", type=float, default=10)
+    replica.add_argument("--sync-interval", type=float, default=1.0)
+    replica.add_argument("--tuned", action="store_true", help="профиль SQLITE_TUNED=1 (WAL)")
+    replica.set_defaults(func=bench_replica)
+
+    dashboard = sub.add_parser("dashboard", help="дашборд работодателя: счётчики против подсчёта откликов")
+    dashboard.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    dashboard.add_argument("--repeat", type=int, default=50)
+    dashboard.set_defaults(func=bench_dashboard)
+
+    facets = sub.add_parser("facets", help="фасеты списка вакансий: COUNT на значение против GROUP BY")
+    facets.add_argument("--jobs", type=int, default=1000000)
+    facets.add_argument("--repeat", type=int, default=5)
+    facets.set_defaults(func=bench_facets)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# commands.py
+"""Команды Flask CLI для обслуживания базы.
+
+    flask archive                      # закрытые вакансии и старые отклики -> архив
+    flask archive --dry-run            # только посчитать
+    flask archive --jobs-days 90 --vacuum
+    flask replicate                    # держать файл реплики (READ_DATABASE_URL) в синхроне
+    flask reconcile-counters           # пересчитать счётчики откликов по статусам
+    flask rebuild-search-index         # создать и заново заполнить FTS-индекс job_fts
+"""
+from datetime import datetime, timedelta
+
+import click
+
+from archive import archive_applications, archive_jobs, compact_database
+from dashboard import count_drifted_jobs, recompute_status_counts
+from db_routing import ReplicaSync, sqlite_path
+from models import db
+from response_cache import response_cache
+from search import fts_available, rebuild_search_index
+
+
+def init_commands(app):
+    @app.cli.command("archive")
+    @click.option("--jobs-days", type=int, default=None,
+                  help="закрытые вакансии старше N дней (по умолчанию ARCHIVE_JOBS_AFTER_DAYS)")
+    @click.option("--applications-days", type=int, default=None,
+                  help="завершённые отклики старше N дней (по умолчанию ARCHIVE_APPLICATIONS_AFTER_DAYS)")
+    @click.option("--batch-size", type=int, default=None, help="строк в одной транзакции")
+    @click.option("--dry-run", is_flag=True, help="только посчитать, ничего не переносить")
+    @click.option("--vacuum", is_flag=True, help="полный VACUUM с переводом базы в auto_vacuum=INCREMENTAL")
+    def archive_command(jobs_days, applications_days, batch_size, dry_run, vacuum):
+        """Переносит закрытые вакансии и завершённые отклики в архивные таблицы."""
+        config = app.config
+        now = datetime.utcnow()
+        jobs_before = now - timedelta(days=jobs_days if jobs_days is not None
+                                      else config["ARCHIVE_JOBS_AFTER_DAYS"])
+        applications_before = now - timedelta(days=applications_days if applications_days is not None
+                                              else config["ARCHIVE_APPLICATIONS_AFTER_DAYS"])
+        batch_size = batch_size or config["ARCHIVE_BATCH_SIZE"]
+
+        n_jobs, n_job_apps = archive_jobs(jobs_before, batch_size, dry_run)
+        n_apps = archive_applications(applications_before, batch_size, dry_run)
+        verb = "будет перенесено" if dry_run else "перенесено"
+        click.echo(f"{verb}: вакансий {n_jobs} (с откликами: {n_job_apps}), "
+                   f"завершённых откликов {n_apps}")
+        if dry_run:
+            return
+
+        # при общем бэкенде (sqlite) это сбросит кэш ответов всем воркерам
+        response_cache.invalidate("jobs")
+        freed = compact_database(full_vacuum=vacuum)
+        click.echo(f"освобождено страниц: {freed}; статистика ANALYZE обновлена")
+
+    @app.cli.command("replicate")
+    @click.option("--interval", type=float, default=None,
+                  help="секунд между проверками (по умолчанию REPLICA_SYNC_INTERVAL)")
+    def replicate_command(interval):
+        """Копирует основную базу SQLite в файл реплики, пока не прервут (Ctrl+C)."""
+        primary = sqlite_path(app.config["SQLALCHEMY_DATABASE_URI"])
+        replica = sqlite_path(app.config.get("SQLALCHEMY_READ_DATABASE_URI"))
+        if primary is None or replica is None:
+            raise click.UsageError("нужны SQLite-файлы в DATABASE_URL и READ_DATABASE_URL")
+        sync = ReplicaSync(primary, replica, interval or app.config["REPLICA_SYNC_INTERVAL"])
+        click.echo(f"{primary} -> {replica} каждые {sync.interval} с")
+        try:
+            sync.run()
+        except KeyboardInterrupt:
+            click.echo(f"остановлено, копий: {sync.syncs}")
+        finally:
+            sync.stop()
+
+    @app.cli.command("reconcile-counters")
+    @click.option("--dry-run", is_flag=True, help="только найти расхождения")
+    def reconcile_counters_command(dry_run):
+        """Сверяет счётчики откликов вакансий с GROUP BY по откликам и пересчитывает их."""
+        drifted = count_drifted_jobs()
+        click.echo(f"вакансий с расхождениями: {drifted}")
+        if dry_run or not drifted:
+            return
+        recompute_status_counts()
+        db.session.commit()
+        click.echo("счётчики пересчитаны")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Создаёт FTS-индекс вакансий, если его нет, и перестраивает его из таблицы job."""
+        if not fts_available():
+            raise click.UsageError("FTS-поиск выключен (SEARCH_BACKEND) или база не SQLite")
+        rebuild_search_index()
+        response_cache.invalidate("jobs")
+        click.echo("индекс поиска перестроен")
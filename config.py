@@ -3,5 +3,83 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'yy'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'database.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'database.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Поиск по вакансиям: "fts" — индекс SQLite FTS5 (search.py), "like" — старый ILIKE
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'fts')
+
+    # Кэш снимков пользователей сессии (auth.py)
+    USER_CACHE_SIZE = 4096
+    USER_CACHE_TTL = 60  # секунд
+
+    # Кэш ответов GET /api/jobs (response_cache.py): "memory" или "sqlite" (общий для воркеров)
+    # memory живёт в одном процессе: инвалидация в одном воркере не доходит до остальных,
+    # и они отдают старые ответы до истечения RESPONSE_CACHE_TTL. Поэтому при нескольких
+    # воркерах (WEB_CONCURRENCY > 1, его читает gunicorn) по умолчанию берётся sqlite
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND') or (
+        'sqlite' if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1 else 'memory')
+    RESPONSE_CACHE_SIZE = 1024
+    RESPONSE_CACHE_TTL = 5  # секунд, только для memory: предел устаревания в чужих воркерах
+    RESPONSE_CACHE_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'response_cache.db')
+
+    # Байесовское среднее оценок (ratings.py): априорное среднее и его вес в "голосах"
+    RATING_PRIOR_MEAN = 3.0
+    RATING_PRIOR_WEIGHT = 5
+
+    # Максимум элементов в одном запросе к /api/jobs/bulk и /api/applications/bulk
+    BULK_MAX_ITEMS = 5000
+
+    # Профиль SQLite для нескольких воркеров (sqlite_tuning.py): WAL, PRAGMA, пул
+    SQLITE_TUNED = os.environ.get('SQLITE_TUNED') == '1'
+    SQLITE_BUSY_TIMEOUT_MS = 5000
+    SQLITE_CACHE_SIZE_KIB = 65536
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    # Повтор пишущих обработчиков при "database is locked"
+    WRITE_RETRY_ATTEMPTS = 5
+    WRITE_RETRY_BASE_DELAY = 0.02  # секунд
+
+    # Выгрузка откликов (export.py): строк в пачке и уровень gzip
+    # (1 — сжимает хуже 6: ~4.5x против ~7x на откликах, но в разы быстрее на потоке в сотни МБ)
+    EXPORT_BATCH_SIZE = 1000
+    EXPORT_GZIP_LEVEL = 1
+
+    # Архивация (archive.py, flask archive): возраст в днях и строк в одной транзакции
+    ARCHIVE_JOBS_AFTER_DAYS = 180
+    ARCHIVE_APPLICATIONS_AFTER_DAYS = 365
+    ARCHIVE_BATCH_SIZE = 1000
+
+    # Push-уведомления по SSE (events.py): "memory" или "sqlite" (рассылка между воркерами)
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'memory')
+    EVENTS_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'events.db')
+    EVENTS_QUEUE_SIZE = 100  # событий в очереди одного подписчика
+    EVENTS_HEARTBEAT = 15  # секунд
+    EVENTS_POLL_INTERVAL = 0.2  # секунд, только для sqlite
+
+    # Рекомендации вакансий (recommend.py, нужны numpy и scipy)
+    RECOMMEND_FEATURES = 2 ** 18  # столбцов хэшированной матрицы термов
+    RECOMMEND_TITLE_WEIGHT = 3.0
+    RECOMMEND_MAX_TERMS = 64  # самых весомых термов профиля в одном запросе
+    RECOMMEND_HISTORY = 20  # последних откликов студента в профиле
+    RECOMMEND_REFRESH_SECONDS = 300  # полная перестройка: изменения других воркеров
+
+    # Групповой commit откликов (group_commit.py): пачка — не дольше MAX_DELAY_MS и не больше MAX_BATCH строк
+    GROUP_COMMIT = os.environ.get('GROUP_COMMIT') == '1'
+    GROUP_COMMIT_MAX_BATCH = 256
+    GROUP_COMMIT_MAX_DELAY_MS = 5
+    GROUP_COMMIT_TIMEOUT = 10  # секунд в очереди; потом строка снимается с очереди и ответ 503
+
+    # Хэширование паролей (passwords.py): метод werkzeug и ограничение параллельности KDF
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)  # остальные ядра — обычным запросам
+    PASSWORD_HASH_QUEUE = 32
+    PASSWORD_HASH_WAIT = 2.0  # секунд ожидания места в очереди, затем 429
+
+    # Чтение с реплики (db_routing.py): пусто — всё идёт в основную базу
+    SQLALCHEMY_READ_DATABASE_URI = os.environ.get('READ_DATABASE_URL')
+    READ_STICKY_SECONDS = 5  # после записи клиент читает из основной базы; больше отставания реплики
+    REPLICA_SYNC_INTERVAL = 1.0  # секунд, для flask replicate (локальная замена репликации)
+
+    # Метрики и /metrics в формате Prometheus (metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_SLOW_QUERY_MS = 200
@@ -0,0 +1,125 @@
+# dashboard.py
+"""Счётчики откликов вакансии по статусам для GET /api/dashboard.
+
+Job.applications_<статус> меняются в той же транзакции, что и сами отклики:
+подача — +1 к submitted, смена статуса — -1 старому и +1 новому, массовые
+операции — одним executemany. Дашборд читает только строки вакансий
+работодателя, и его стоимость не зависит от числа откликов.
+
+Старый статус читает сам UPDATE счётчиков (подзапрос к application), и
+выполняется он до UPDATE отклика: к этому моменту транзакция уже держит
+блокировку записи SQLite, так что параллельная смена того же отклика не
+посчитается дважды.
+
+Как и агрегаты оценок (ratings.py), счётчики учитывают и архивные отклики:
+archive_applications переносит строки, но итоги вакансии не меняются.
+Если счётчики разошлись с данными (загрузка в обход обработчиков, ручные
+правки), их пересчитывает flask reconcile-counters.
+"""
+from sqlalchemy import bindparam, case, func, or_, select, union_all, update
+
+from models import db, Job, Application, ArchivedApplication
+
+APPLICATION_STATUSES = ("submitted", "in_review", "invited", "rejected", "accepted")
+STATUS_COLUMNS = {status: getattr(Job, f"applications_{status}") for status in APPLICATION_STATUSES}
+
+# Core-таблицы, а не модели: executemany по update(Job) Session.execute
+# выполнил бы как ORM bulk UPDATE по первичному ключу
+_job, _application = Job.__table__, Application.__table__
+
+# новые отклики: одна строка параметров на вакансию
+_ADD_SUBMITTED = (
+    update(_job)
+    .where(_job.c.id == bindparam("job_id_"))
+    .values(applications_submitted=_job.c.applications_submitted + bindparam("n"))
+)
+
+# смена статуса: одна строка параметров на отклик (app_id_, new_status)
+_current = select(_application.c.status).where(_application.c.id == bindparam("app_id_")).scalar_subquery()
+_CHANGE_STATUS = (
+    update(_job)
+    .where(_job.c.id == select(_application.c.job_id)
+           .where(_application.c.id == bindparam("app_id_")).scalar_subquery())
+    .values({column.key: _job.c[column.key]
+             - case((_current == status, 1), else_=0)
+             + case((bindparam("new_status") == status, 1), else_=0)
+             for status, column in STATUS_COLUMNS.items()})
+)
+
+
+def record_applications(per_job, conn=None):
+    """Новые отклики {job_id: сколько}; в текущей транзакции db.session или conn."""
+    params = [{"job_id_": job_id, "n": n} for job_id, n in per_job.items() if n]
+    if params:
+        (conn or db.session).execute(_ADD_SUBMITTED, params)
+
+
+def record_status_changes(changes):
+    """Смена статусов [(app_id, new_status)]: вызывать ДО обновления самих откликов.
+
+    Commit делает вызывающий.
+    """
+    if changes:
+        db.session.execute(_CHANGE_STATUS, [{"app_id_": app_id, "new_status": status}
+                                            for app_id, status in changes])
+
+
+def employer_dashboard(employer_id):
+    """Вакансии работодателя со счётчиками по статусам и общие итоги."""
+    rows = db.session.query(Job.id, Job.title, Job.status, Job.created_at, *STATUS_COLUMNS.values()) \
+        .filter(Job.employer_id == employer_id) \
+        .order_by(Job.created_at.desc(), Job.id.desc()).all()
+    totals = dict.fromkeys(APPLICATION_STATUSES, 0)
+    jobs = []
+    for job_id, title, status, created_at, *counts in rows:
+        applications = dict(zip(APPLICATION_STATUSES, counts))
+        for key, count in applications.items():
+            totals[key] += count
+        jobs.append({
+            "id": job_id,
+            "title": title,
+            "status": status,
+            "created_at": created_at.isoformat() if created_at else None,
+            "applications": applications,
+            "total": sum(counts),
+        })
+    return {"jobs": jobs, "totals": totals, "total": sum(totals.values())}
+
+
+def _counts_by_job():
+    applications = union_all(
+        select(Application.job_id, Application.status),
+        select(ArchivedApplication.job_id, ArchivedApplication.status),
+    ).subquery()
+    return (
+        select(applications.c.job_id,
+               *(func.sum(case((applications.c.status == status, 1), else_=0)).label(status)
+                 for status in APPLICATION_STATUSES))
+        .group_by(applications.c.job_id)
+        .subquery()
+    )
+
+
+def count_drifted_jobs():
+    """Сколько вакансий со счётчиками, не совпадающими с GROUP BY по откликам."""
+    stats = _counts_by_job()
+    return db.session.scalar(
+        select(func.count(Job.id))
+        .select_from(Job)
+        .outerjoin(stats, stats.c.job_id == Job.id)
+        .where(or_(*(func.coalesce(stats.c[status], 0) != column
+                     for status, column in STATUS_COLUMNS.items()))))
+
+
+def recompute_status_counts():
+    """Пересчитывает счётчики всех вакансий одним GROUP BY; commit делает вызывающий."""
+    stats = _counts_by_job()
+    db.session.execute(
+        update(Job).values({column: 0 for column in STATUS_COLUMNS.values()})
+        .execution_options(synchronize_session=False))
+    # UPDATE ... FROM, как в recompute_rating_stats
+    db.session.execute(
+        update(Job)
+        .where(Job.id == stats.c.job_id)
+        .values({column: stats.c[status] for status, column in STATUS_COLUMNS.items()})
+        .execution_options(synchronize_session=False))
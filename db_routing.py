@@ -0,0 +1,138 @@
+# db_routing.py
+"""Чтение с реплики: GET-запросы читают из отдельной базы, записи идут в основную.
+
+Включается SQLALCHEMY_READ_DATABASE_URI (READ_DATABASE_URL): реплика
+подключается как bind "replica" Flask-SQLAlchemy, а RoutingSession.get_bind
+выбирает движок для каждого запроса к базе:
+
+- SELECT внутри GET/HEAD-запроса — реплика;
+- flush, UPDATE/INSERT/DELETE, text(), любые запросы в POST/PUT/DELETE
+  и всё вне HTTP-запроса (CLI, фоновые потоки) — основная база;
+- read-your-writes: после записи сессия клиента (cookie Flask) ещё
+  READ_STICKY_SECONDS читает из основной базы, чтобы не увидеть на
+  реплике своё же состояние до записи. Окно должно быть больше
+  отставания реплики.
+
+Реплика отстаёт, поэтому то, что кэшируется дольше одного ответа, строится
+по основной базе (use_primary): иначе устаревшая выборка осела бы в кэше
+под новым поколением.
+
+Для локальной проверки реплику заменяет ReplicaSync (flask replicate):
+копия основного файла SQLite через backup API, когда в нём что-то
+поменялось. Это не настоящая репликация — только способ получить вторую
+базу с отставанием.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = "replica"
+READ_METHODS = ("GET", "HEAD")
+_STICKY_KEY = "_db_wrote_at"
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                if self._flushing or getattr(clause, "is_dml", False):
+                    mark_written()
+                elif getattr(clause, "is_select", False) and _reads_from_replica():
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _reads_from_replica():
+    if request.method not in READ_METHODS or g.get("db_use_primary"):
+        return False
+    wrote_at = session.get(_STICKY_KEY)
+    return wrote_at is None or time.time() - wrote_at >= current_app.config["READ_STICKY_SECONDS"]
+
+
+def mark_written():
+    """Закрепляет сессию клиента за основной базой на READ_STICKY_SECONDS.
+
+    Вызывается сам при записи через db.session; записи в обход сессии
+    (групповой commit) отмечают себя явно.
+    """
+    if has_request_context() and session.get(_STICKY_KEY) != int(time.time()):
+        session[_STICKY_KEY] = int(time.time())
+
+
+@contextmanager
+def use_primary():
+    """Внутри блока все чтения текущего запроса идут в основную базу."""
+    previous = g.get("db_use_primary", False)
+    g.db_use_primary = True
+    try:
+        yield
+    finally:
+        g.db_use_primary = previous
+
+
+def sqlite_path(uri):
+    return uri.split("sqlite:///", 1)[1] if uri and uri.startswith("sqlite:///") else None
+
+
+class ReplicaSync:
+    """Копирует основной файл SQLite в файл реплики, если тот изменился."""
+
+    def __init__(self, primary_path, replica_path, interval=1.0):
+        self.primary_path = primary_path
+        self.replica_path = replica_path
+        self.interval = interval
+        self.syncs = 0
+        self._version = None
+        self._source = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def sync_once(self, force=False):
+        """Возвращает True, если реплика обновлена."""
+        if self._source is None:
+            self._source = sqlite3.connect(self.primary_path, timeout=5, check_same_thread=False)
+        # data_version меняется, только когда commit сделало другое соединение
+        version = self._source.execute("PRAGMA data_version").fetchone()[0]
+        if not force and version == self._version:
+            return False
+        target = sqlite3.connect(self.replica_path, timeout=5)
+        try:
+            self._source.backup(target)
+        finally:
+            target.close()
+        self._version = version
+        self.syncs += 1
+        return True
+
+    def run(self):
+        self.sync_once(force=True)
+        while not self._stopped.wait(self.interval):
+            self.sync_once()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="replica-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+
+def init_db_routing(app):
+    """Вызывается до db.init_app(): реплика становится bind "replica"."""
+    uri = app.config.get("SQLALCHEMY_READ_DATABASE_URI")
+    if not uri:
+        return
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds[REPLICA_BIND] = uri
+    app.config["SQLALCHEMY_BINDS"] = binds
@@ -0,0 +1,209 @@
+# events.py
+"""Push-уведомления через Server-Sent Events вместо опроса GET /api/applications.
+
+Обработчики после commit публикуют событие в канал пользователя
+("user:<id>"), а GET /api/events держит открытый поток и отдаёт события
+подписчику по мере появления. Раз в EVENTS_HEARTBEAT секунд уходит
+комментарий-heartbeat, чтобы прокси не закрывали простаивающее соединение.
+
+У каждого подписчика своя очередь на EVENTS_QUEUE_SIZE событий. Если
+клиент не успевает читать и очередь переполнилась, новые события не
+копятся: подписчик получает событие "resync" (перечитать список откликов
+целиком), и поток закрывается. Память на медленного клиента ограничена.
+
+Брокеры:
+    memory — подписчики в памяти процесса (по умолчанию, один воркер);
+    sqlite — общий файл SQLite: локальная замена Redis pub/sub. Публикация
+             пишет строку в таблицу, фоновый поток каждого воркера забирает
+             новые строки и раздаёт их своим подписчикам. Поток и его
+             соединение появляются при первой подписке, а не при импорте:
+             под gunicorn --preload иначе они остались бы в мастер-процессе
+             и не пережили fork.
+
+Поток держит поток воркера всё время соединения: под gunicorn нужны
+gthread/gevent-воркеры, а не sync.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            self._next_id += 1
+            self.dispatch(channel, (self._next_id, event, data))
+
+    def dispatch(self, channel, message):
+        for subscription in list(self._channels.get(channel, ())):
+            subscription.put(message)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def close(self):
+        pass
+
+
+class SQLiteBroker(LocalBroker):
+    """Рассылка между процессами через таблицу events в общем файле SQLite."""
+
+    RETENTION = 60  # секунд: дольше событие никому не нужно
+
+    def __init__(self, path, queue_size=100, poll_interval=0.2):
+        super().__init__(queue_size)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        # соединение только на время DDL: потоковые соединения создаются уже в воркере
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "channel TEXT, event TEXT, data TEXT, created_at REAL)")
+        finally:
+            conn.close()
+        self._last_id = 0
+        self._stopped = threading.Event()
+        self._poller = None
+        self._start_lock = threading.Lock()
+
+    def subscribe(self, channel):
+        if self._poller is None:
+            with self._start_lock:
+                if self._poller is None:
+                    # старые события новым подписчикам не нужны
+                    self._last_id = self._connect().execute(
+                        "SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+                    self._poller = threading.Thread(target=self._poll, name="events-poller", daemon=True)
+                    self._poller.start()
+        return super().subscribe(channel)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channel, event, data):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("INSERT INTO events (channel, event, data, created_at) VALUES (?, ?, ?, ?)",
+                     (channel, event, json.dumps(data, ensure_ascii=False), now))
+        conn.execute("DELETE FROM events WHERE created_at < ?", (now - self.RETENTION,))
+
+    def _poll(self):
+        while not self._stopped.wait(self.poll_interval):
+            self.poll_once()
+
+    def poll_once(self):
+        if not self._channels:
+            # события без подписчиков в этом воркере не нужны — просто сдвигаем позицию
+            self._last_id = self._connect().execute(
+                "SELECT COALESCE(MAX(id), ?) FROM events", (self._last_id,)).fetchone()[0]
+            return
+        rows = self._connect().execute(
+            "SELECT id, channel, event, data FROM events WHERE id > ? ORDER BY id",
+            (self._last_id,)).fetchall()
+        with self._lock:
+            for event_id, channel, event, data in rows:
+                self.dispatch(channel, (event_id, event, json.loads(data)))
+        if rows:
+            self._last_id = rows[-1][0]
+
+    def close(self):
+        self._stopped.set()
+
+
+broker = LocalBroker()
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def subscribe(user_id):
+    return broker.subscribe(user_channel(user_id))
+
+
+def publish(user_id, event, data):
+    """Вызывается после commit: событие не должно обгонять запись в базе."""
+    broker.publish(user_channel(user_id), event, data)
+
+
+def format_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def event_stream(subscription, heartbeat):
+    """Генератор SSE; подписка снимается, когда клиент отключается."""
+    try:
+        # клиент переподключится через 5 с, если соединение оборвётся
+        yield "retry: 5000\n\n"
+        while True:
+            message = subscription.get(timeout=heartbeat)
+            if subscription.overflowed:
+                yield format_event(0, "resync", {"reason": "queue overflow"})
+                return
+            if message is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield format_event(*message)
+    finally:
+        subscription.broker.unsubscribe(subscription)
+
+
+def init_events(app):
+    global broker
+    broker.close()
+    size = app.config["EVENTS_QUEUE_SIZE"]
+    if app.config["EVENTS_BACKEND"] == "sqlite":
+        broker = SQLiteBroker(app.config["EVENTS_PATH"], queue_size=size,
+                              poll_interval=app.config["EVENTS_POLL_INTERVAL"])
+    else:
+        broker = LocalBroker(queue_size=size)
@@ -0,0 +1,104 @@
+# explain_queries.py
+"""Печатает EXPLAIN QUERY PLAN для SQL, который выполняют маршруты routes.py.
+
+Маршруты вызываются через app.test_client() на временной базе с парой
+пользователей, вакансией и откликом; каждый перехваченный SELECT
+прогоняется через EXPLAIN QUERY PLAN. Полный проход по таблице (SCAN без
+индекса) помечается "!!" и делает код возврата ненулевым — удобно для CI.
+
+    python explain_queries.py
+"""
+import os
+import sys
+import tempfile
+
+fd, DB_PATH = tempfile.mkstemp(prefix="explain-", suffix=".db")
+os.close(fd)
+os.environ["DATABASE_URL"] = "sqlite:///" + DB_PATH
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, Job, Application  # noqa: E402
+from response_cache import response_cache  # noqa: E402
+
+
+def login(client, username, role):
+    client.post("/register", data={"username": username, "password": "123", "role": role})
+    client.post("/login", data={"username": username, "password": "123"})
+
+
+def scenario(employer, student, job_id, app_id):
+    """(название, клиент, метод, url, json) — по запросу на каждый сценарий маршрутов."""
+    return [
+        ("jobs: open", employer, "get", "/api/jobs", None),
+        ("jobs: job_type", employer, "get", "/api/jobs?job_type=internship", None),
+        ("jobs: search", employer, "get", "/api/jobs?q=python", None),
+        ("jobs: page", employer, "get", "/api/jobs?limit=1", None),
+        ("jobs: with archive", employer, "get", "/api/jobs?include_archived=1&limit=1", None),
+        ("jobs: facets", employer, "get", "/api/jobs?facets=1&limit=1", None),
+        ("jobs: facets + search", employer, "get", "/api/jobs?facets=1&q=python&limit=1", None),
+        ("job detail", employer, "get", f"/api/jobs/{job_id}", None),
+        ("job update", employer, "put", f"/api/jobs/{job_id}", {"title": "Python backend"}),
+        ("apply (duplicate)", student, "post", f"/api/jobs/{job_id}/apply", {"resume_url": "r"}),
+        ("applications: student", student, "get", "/api/applications", None),
+        ("applications: employer", employer, "get", "/api/applications", None),
+        ("applications: student + archive", student, "get", "/api/applications?include_archived=1", None),
+        ("applications: employer + archive", employer, "get", "/api/applications?include_archived=1", None),
+        ("applications: export", employer, "get", "/api/applications/export?format=ndjson", None),
+        ("application status", employer, "put", f"/api/applications/{app_id}", {"status": "in_review"}),
+        ("rate job", student, "post", f"/api/jobs/{job_id}/rate", {"rating": 5}),
+        ("rate application", student, "post", f"/api/rate/{app_id}", {"rating": 4}),
+        ("profile", student, "get", "/api/profile", None),
+    ]
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+
+    employer, student = app.test_client(), app.test_client()
+    login(employer, "explain-employer", "employer")
+    login(student, "explain-student", "student")
+    employer.post("/api/jobs", json={"title": "Python dev", "description": "Flask API"})
+    with app.app_context():
+        job_id = Job.query.first().id
+    student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"})
+    with app.app_context():
+        app_id = Application.query.first().id
+
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    full_scans = 0
+    for name, client, method, url, payload in scenario(employer, student, job_id, app_id):
+        response_cache.clear()
+        captured.clear()
+        getattr(client, method)(url, json=payload)
+        print(f"== {name}: {method.upper()} {url}")
+        for statement, parameters in list(captured):
+            print("   " + " ".join(statement.split())[:160])
+            with engine.connect() as conn:
+                plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                is_scan = detail.startswith("SCAN") and "VIRTUAL TABLE" not in detail \
+                    and "USING" not in detail
+                full_scans += is_scan
+                print(f"   {'!!' if is_scan else '  '} {detail}")
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+    print(f"\nполных сканирований: {full_scans}")
+    return 1 if full_scans else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        os.remove(DB_PATH)
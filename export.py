@@ -0,0 +1,89 @@
+# export.py
+"""Потоковая выгрузка откликов в CSV и NDJSON.
+
+Строки читаются серверным курсором (yield_per) и уходят клиенту пачками:
+в памяти процесса одновременно живёт не больше одной пачки, сколько бы
+строк ни было в выборке. При Accept-Encoding: gzip каждая пачка сжимается
+и сбрасывается Z_SYNC_FLUSH — клиент получает данные сразу, а не в конце.
+
+Текстовые поля в CSV пишут студенты, а открывает файл работодатель в
+Excel: значения, начинающиеся с =, +, -, @, табуляции или CR, получают
+префикс ', чтобы не выполниться как формула.
+"""
+import csv
+import io
+import zlib
+
+from flask import Response, current_app, request, stream_with_context
+
+from serializers import dumps
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# ячейки, которые Excel/LibreOffice считают формулой (CSV injection)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value):
+    """Строку, похожую на формулу, экранирует апострофом; остальное как есть."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(rows, projection, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM — чтобы Excel открыл кириллицу в UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(projection.keys)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([csv_cell(value) for value in projection.to_dict(row).values()])
+        if i % batch_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(rows, projection, batch_size):
+    to_dict = projection.to_dict
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(to_dict(row)))
+        if len(chunk) >= batch_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+def gzip_chunks(chunks, level):
+    # wbits=31 — формат gzip (заголовок и CRC), а не «голый» zlib
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(query, projection, fmt, filename):
+    """Response с выгрузкой query в формате fmt ("csv" или "ndjson")."""
+    batch_size = current_app.config["EXPORT_BATCH_SIZE"]
+    rows = query.yield_per(batch_size)
+    if fmt == "csv":
+        chunks = csv_chunks(rows, projection, batch_size)
+    else:
+        chunks = ndjson_chunks(rows, projection, batch_size)
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+               "Vary": "Accept-Encoding"}
+    if "gzip" in request.accept_encodings:
+        chunks = gzip_chunks(chunks, current_app.config["EXPORT_GZIP_LEVEL"])
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(chunks), mimetype=FORMATS[fmt], headers=headers)
@@ -0,0 +1,58 @@
+# facets.py
+"""Фасеты списка вакансий (GET /api/jobs?facets=1): сколько вакансий каждого
+job_type и status подходит под текущий q.
+
+Все значения обоих фасетов даёт один GROUP BY status, job_type по вакансиям,
+подходящим под q (FTS5 или ILIKE — так же, как и сам список). Фасеты
+собираются из этой таблицы в Python: job_type — при выбранном status,
+status — при выбранном job_type. Собственный фильтр фасет не сужает,
+поэтому рядом с выбранным значением видны и соседние.
+
+Таблица без q (все вакансии — самый дорогой проход) кэшируется в
+response_cache под поколением "jobs" и сбрасывается любой записью в
+вакансии. С q отдельного кэша нет: весь ответ и так лежит в кэше ответов.
+"""
+from sqlalchemy import func, select, union_all
+
+from models import db, Job, ArchivedJob
+from response_cache import response_cache
+from search import keyword_criterion, like_filter
+
+
+def _grouped(model, criterion):
+    query = select(model.status, model.job_type, func.count())
+    if criterion is not None:
+        query = query.where(criterion)
+    return query.group_by(model.status, model.job_type)
+
+
+def grouped_counts(keyword, archived=False):
+    """[(status, job_type, число вакансий)] одним запросом."""
+    if not archived:
+        criterion = keyword_criterion(keyword) if keyword else None
+        return [tuple(row) for row in db.session.execute(_grouped(Job, criterion))]
+
+    # как и в списке: у архива нет FTS, по обеим частям ILIKE
+    statement = union_all(
+        _grouped(Job, like_filter(Job, keyword) if keyword else None),
+        _grouped(ArchivedJob, like_filter(ArchivedJob, keyword) if keyword else None),
+    )
+    counts = {}
+    for status, job_type, n in db.session.execute(statement):
+        counts[status, job_type] = counts.get((status, job_type), 0) + n
+    return [(status, job_type, n) for (status, job_type), n in counts.items()]
+
+
+def job_facets(keyword, status, job_type, archived=False):
+    if keyword:
+        rows = grouped_counts(keyword, archived)
+    else:
+        rows = response_cache.value("jobs", ("facets", archived), lambda: grouped_counts(None, archived))
+
+    by_status, by_type = {}, {}
+    for row_status, row_type, n in rows:
+        if row_status is not None and (not job_type or row_type == job_type):
+            by_status[row_status] = by_status.get(row_status, 0) + n
+        if row_type is not None and row_status == status:
+            by_type[row_type] = by_type.get(row_type, 0) + n
+    return {"status": by_status, "job_type": by_type}
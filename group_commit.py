@@ -0,0 +1,186 @@
+# group_commit.py
+"""Групповой commit откликов для пиков POST /api/jobs/<id>/apply (GROUP_COMMIT=1).
+
+Когда открывается популярная вакансия, сотни студентов откликаются
+одновременно. Каждый отдельный commit — это своя блокировка записи
+и свой fsync, и запросы выстраиваются в очередь к SQLite.
+
+В режиме группового commit обработчик проверяет запрос сам, кладёт
+строку в очередь и ждёт подтверждения. Поток-писатель забирает из
+очереди всё, что накопилось за GROUP_COMMIT_MAX_DELAY_MS (но не больше
+GROUP_COMMIT_MAX_BATCH строк), и вставляет пачку одной транзакцией:
+одна блокировка и один fsync на пачку. Каждый запрос получает свой
+результат (id отклика или «дубль») только после commit этой транзакции.
+
+Если подтверждения нет за GROUP_COMMIT_TIMEOUT, запрос отменяет свою
+строку. Пока строка лежит в очереди, отмена удаётся, писатель её
+пропускает, и клиент получает 503: повтор безопасен, строки в базе нет
+и не будет. Если пачка со строкой уже пишется, отменить её нельзя, и
+запрос дожидается исхода транзакции: ответ (201, 409 или 503) всегда
+совпадает с тем, что лежит в базе.
+
+Поток запускается при первой записи, а не при импорте: так он
+создаётся в воркере gunicorn, а не в мастер-процессе до fork.
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+
+from dashboard import record_applications
+from models import db, Application
+from sqlite_tuning import is_busy_error
+
+
+class DuplicateApplication(Exception):
+    pass
+
+
+class WriterBusy(Exception):
+    """Пачку не удалось записать: база занята дольше всех повторов."""
+
+
+class GroupCommitWriter:
+    def __init__(self, engine, handler, max_batch=256, max_delay=0.005, retry_attempts=5,
+                 retry_base_delay=0.02):
+        self.engine = engine
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retry_attempts = retry_attempts
+        self.retry_base_delay = retry_base_delay
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, payload):
+        """Ставит строку в очередь; Future завершится после commit её пачки."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                    self._thread.start()
+        future = Future()
+        self.queue.put((payload, future))
+        return future
+
+    def stop(self):
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        # отменённые по таймауту строки не пишем; остальные отменить уже нельзя
+        batch = [(payload, future) for payload, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        payloads = [payload for payload, _ in batch]
+        for attempt in range(self.retry_attempts + 1):
+            try:
+                with self.engine.begin() as conn:
+                    results = self.handler(conn, payloads)
+                break
+            except OperationalError as e:
+                if not is_busy_error(e) or attempt == self.retry_attempts:
+                    error = WriterBusy(str(e)) if is_busy_error(e) else e
+                    for _, future in batch:
+                        future.set_exception(error)
+                    return
+                time.sleep(self.retry_base_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        return {"batches": self.batches, "rows": self.rows, "queued": self.queue.qsize()}
+
+
+def insert_applications(conn, rows):
+    """Вставляет пачку откликов в одной транзакции; дубль не валит соседей.
+
+    ON CONFLICT DO NOTHING по уникальному индексу (student_id, job_id):
+    для дубля RETURNING ничего не вернёт, и только этот запрос получит 409.
+    Счётчики вакансий (dashboard.py) растут в той же транзакции.
+    """
+    results, per_job = [], {}
+    for row in rows:
+        statement = sqlite_insert(Application).values(**row) \
+            .on_conflict_do_nothing(index_elements=["student_id", "job_id"]) \
+            .returning(Application.id)
+        inserted = conn.execute(statement).scalar()
+        if inserted is not None:
+            per_job[row["job_id"]] = per_job.get(row["job_id"], 0) + 1
+        results.append(inserted if inserted is not None else DuplicateApplication())
+    record_applications(per_job, conn)
+    return results
+
+
+writer = None
+
+
+def init_group_commit(app):
+    global writer
+    if writer is not None:
+        writer.stop()
+        writer = None
+    if not app.config["GROUP_COMMIT"]:
+        return
+    with app.app_context():
+        engine = db.engine
+    writer = GroupCommitWriter(
+        engine, insert_applications,
+        max_batch=app.config["GROUP_COMMIT_MAX_BATCH"],
+        max_delay=app.config["GROUP_COMMIT_MAX_DELAY_MS"] / 1000,
+        retry_attempts=app.config["WRITE_RETRY_ATTEMPTS"],
+        retry_base_delay=app.config["WRITE_RETRY_BASE_DELAY"],
+    )
+
+
+def submit_application(row, timeout):
+    """Блокирует запрос до commit пачки; возвращает id отклика.
+
+    WriterBusy по таймауту значит, что строка снята с очереди и записана
+    не будет; если её пачка уже пишется, ждём исхода этой транзакции.
+    """
+    future = writer.submit(row)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        if future.cancel():
+            raise WriterBusy("нет подтверждения за отведённое время")
+        return future.result()
@@ -0,0 +1,166 @@
+# metrics.py
+"""Метрики по маршрутам: задержка запросов, число и время SQL, медленные запросы.
+
+Хуки Flask (before/after_request) и события SQLAlchemy
+(before/after_cursor_execute) на всех движках db, включая реплику
+db_routing. Всё отдаётся в текстовом формате Prometheus на /metrics. При METRICS_ENABLED = False ни хуки,
+ни обработчики событий не регистрируются — накладных расходов нет.
+
+Время запроса минус время SQL — это Python: сериализация, хэширование
+паролей и прочая логика обработчика.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# границы корзин гистограмм, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.total}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.sql_time = {}
+        self.sql_count = {}
+        self.requests = {}
+        self.slow_queries = {}
+
+    def record_request(self, method, route, status, duration, sql_count, sql_time):
+        key = (method, route)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(duration)
+            self.sql_time.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(sql_time)
+            self.sql_count.setdefault(key, Histogram(SQL_COUNT_BUCKETS)).observe(sql_count)
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+
+    def record_slow_query(self, route):
+        with self._lock:
+            self.slow_queries[route] = self.slow_queries.get(route, 0) + 1
+
+    def render(self, extra_gauges=()):
+        lines = []
+        with self._lock:
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                             f'status="{status}"}} {value}')
+            for name, help_text, histograms in (
+                    ("http_request_duration_seconds", "время обработки запроса", self.latency),
+                    ("http_request_sql_duration_seconds", "суммарное время SQL за запрос", self.sql_time),
+                    ("http_request_sql_statements", "число SQL-выражений за запрос", self.sql_count)):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.render(name, f'method="{method}",route="{_escape(route)}"'))
+            lines.append("# TYPE sql_slow_queries_total counter")
+            for route, value in sorted(self.slow_queries.items()):
+                lines.append(f'sql_slow_queries_total{{route="{_escape(route)}"}} {value}')
+        for name, labels, value in extra_gauges:
+            lines.append(f"{name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _cache_gauges():
+    from auth import user_cache
+    from response_cache import response_cache
+    for cache_name, stats in (("user", user_cache.stats()), ("response", response_cache.stats())):
+        for key in ("hits", "misses", "size"):
+            yield f"cache_{key}", f'cache="{cache_name}"', stats[key]
+
+
+def init_metrics(app):
+    if not app.config["METRICS_ENABLED"]:
+        return
+    slow_query_seconds = app.config["METRICS_SLOW_QUERY_MS"] / 1000
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+
+    @app.after_request
+    def record(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            registry.record_request(request.method, _route(), response.status_code,
+                                    time.perf_counter() - started,
+                                    g.get("metrics_sql_count", 0), g.get("metrics_sql_time", 0.0))
+        return response
+
+    @app.teardown_request
+    def record_failure(exc):
+        # after_request не вызывается при необработанном исключении
+        started = g.pop("metrics_started", None)
+        if exc is not None and started is not None:
+            registry.record_request(request.method, _route(), 500, time.perf_counter() - started,
+                                    g.get("metrics_sql_count", 0), g.get("metrics_sql_time", 0.0))
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        route = None
+        if has_request_context():
+            g.metrics_sql_count = g.get("metrics_sql_count", 0) + 1
+            g.metrics_sql_time = g.get("metrics_sql_time", 0.0) + elapsed
+            route = _route()
+        if elapsed >= slow_query_seconds:
+            registry.record_slow_query(route or "background")
+            logger.warning("медленный запрос %.1f ms [%s]: %s", elapsed * 1000, route or "background",
+                           " ".join(statement.split())[:500])
+
+    # все движки приложения, включая реплику db_routing (bind "replica")
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(_cache_gauges()), mimetype="text/plain; version=0.0.4")
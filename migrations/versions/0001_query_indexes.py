@@ -0,0 +1,111 @@
+"""Индексы под запросы routes.py и полнотекстовый индекс вакансий
+
+Базы до этой ревизии создавались через create_db.py (db.create_all()),
+поэтому ревизия первая и рассчитывает на уже существующие таблицы.
+
+Уникальный индекс (student_id, job_id) не создастся, если в базе есть
+повторные отклики. Тогда ревизия останавливается и перечисляет пары.
+Удалить дубли автоматически можно только явно:
+
+    flask db upgrade -x dedup_applications=1
+
+остаётся самый ранний отклик пары, остальные переносятся в таблицу
+application_duplicates (downgrade возвращает их обратно).
+
+Revision ID: 0001_query_indexes
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_query_indexes'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+FTS_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5("
+    "title, description, content='job', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN "
+    "INSERT INTO job_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN "
+    "INSERT INTO job_fts(job_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE OF title, description ON job BEGIN "
+    "INSERT INTO job_fts(job_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO job_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO job_fts(job_fts) VALUES ('rebuild')",
+]
+
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+SHOWN_DUPLICATES = 20
+
+
+def _resolve_duplicate_applications():
+    conn = op.get_bind()
+    pairs = conn.execute(sa.text(
+        "SELECT student_id, job_id, COUNT(*) FROM application "
+        "GROUP BY student_id, job_id HAVING COUNT(*) > 1 ORDER BY student_id, job_id")).fetchall()
+    if not pairs:
+        return
+    if context.get_x_argument(as_dictionary=True).get("dedup_applications") != "1":
+        shown = ", ".join(f"(student_id={s}, job_id={j}: {n})" for s, j, n in pairs[:SHOWN_DUPLICATES])
+        more = f" и ещё {len(pairs) - SHOWN_DUPLICATES}" if len(pairs) > SHOWN_DUPLICATES else ""
+        raise RuntimeError(
+            f"Повторные отклики на одну вакансию ({len(pairs)} пар): {shown}{more}. "
+            "Уникальный индекс uq_application_student_job не создать. Удалите дубли вручную или "
+            "запустите flask db upgrade -x dedup_applications=1 — лишние строки будут перенесены "
+            "в application_duplicates.")
+
+    # самый ранний отклик пары остаётся, остальные — в боковую таблицу
+    losers = "SELECT id FROM application WHERE id NOT IN " \
+             "(SELECT MIN(id) FROM application GROUP BY student_id, job_id)"
+    op.execute(f"CREATE TABLE application_duplicates AS SELECT * FROM application WHERE id IN ({losers})")
+    moved = conn.execute(sa.text("SELECT COUNT(*) FROM application_duplicates")).scalar()
+    op.execute("DELETE FROM application WHERE id IN (SELECT id FROM application_duplicates)")
+    logger.warning("повторные отклики: %d строк перенесено в application_duplicates", moved)
+
+
+def upgrade():
+    # до любого DDL: в SQLite alembic не откатывает уже созданные индексы
+    _resolve_duplicate_applications()
+    op.create_index('ix_job_status_created_at', 'job', ['status', 'created_at'])
+    op.create_index('ix_job_status_job_type_created_at', 'job', ['status', 'job_type', 'created_at'])
+    op.create_index('ix_job_employer_id', 'job', ['employer_id'])
+
+    op.create_index('uq_application_student_job', 'application', ['student_id', 'job_id'], unique=True)
+    op.create_index('ix_application_student_id_applied_at', 'application', ['student_id', 'applied_at'])
+    op.create_index('ix_application_job_id_applied_at', 'application', ['job_id', 'applied_at'])
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in FTS_STATEMENTS:
+            op.execute(statement)
+    op.execute("ANALYZE")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS job_fts")
+        for trigger in ('job_fts_ai', 'job_fts_ad', 'job_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    op.drop_index('ix_application_job_id_applied_at', table_name='application')
+    op.drop_index('ix_application_student_id_applied_at', table_name='application')
+    op.drop_index('uq_application_student_job', table_name='application')
+    if sa.inspect(op.get_bind()).has_table('application_duplicates'):
+        op.execute("INSERT INTO application SELECT * FROM application_duplicates")
+        op.drop_table('application_duplicates')
+    op.drop_index('ix_job_employer_id', table_name='job')
+    op.drop_index('ix_job_status_job_type_created_at', table_name='job')
+    op.drop_index('ix_job_status_created_at', table_name='job')
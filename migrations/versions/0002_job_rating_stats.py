@@ -0,0 +1,55 @@
+"""Агрегаты оценок вакансий: rating_count, rating_sum, rating_score
+
+Счётчики заполняются из Application.rating. Вакансии, у которых есть
+только старое значение job_rating (без оценок откликов), считаются
+одной оценкой с этим значением.
+
+Revision ID: 0002_job_rating_stats
+Revises: 0001_query_indexes
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_job_rating_stats'
+down_revision = '0001_query_indexes'
+branch_labels = None
+depends_on = None
+
+# совпадает с Config.RATING_PRIOR_MEAN / RATING_PRIOR_WEIGHT на момент ревизии
+PRIOR_MEAN = 3.0
+PRIOR_WEIGHT = 5
+
+
+def upgrade():
+    # без batch-режима: пересоздание таблицы job потеряло бы триггеры job_fts
+    op.add_column('job', sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('job', sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('job', sa.Column('rating_score', sa.Float(), nullable=True))
+
+    op.execute("""
+        UPDATE job SET
+            rating_count = (SELECT COUNT(rating) FROM application WHERE application.job_id = job.id),
+            rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM application WHERE application.job_id = job.id)
+    """)
+    op.execute("""
+        UPDATE job SET rating_count = 1, rating_sum = CAST(ROUND(job_rating) AS INTEGER)
+        WHERE rating_count = 0 AND job_rating IS NOT NULL
+    """)
+    op.execute(f"""
+        UPDATE job SET
+            job_rating = CASE WHEN rating_count > 0 THEN rating_sum * 1.0 / rating_count END,
+            rating_score = CASE WHEN rating_count > 0
+                THEN ({PRIOR_WEIGHT} * {PRIOR_MEAN} + rating_sum) / ({PRIOR_WEIGHT} + rating_count) END
+    """)
+    op.create_index('ix_job_status_rating_score', 'job', ['status', 'rating_score'])
+
+
+def downgrade():
+    op.drop_index('ix_job_status_rating_score', table_name='job')
+    op.drop_column('job', 'rating_score')
+    op.drop_column('job', 'rating_sum')
+    op.drop_column('job', 'rating_count')
@@ -0,0 +1,65 @@
+"""Архивные таблицы job_archive и application_archive
+
+Revision ID: 0003_archive_tables
+Revises: 0002_job_rating_stats
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_archive_tables'
+down_revision = '0002_job_rating_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=150), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('employer_id', sa.Integer(), nullable=False),
+        sa.Column('job_rating', sa.Float(), nullable=True),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_score', sa.Float(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['employer_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_archive_status_created_at', 'job_archive', ['status', 'created_at'])
+    op.create_index('ix_job_archive_employer_id', 'job_archive', ['employer_id'])
+
+    op.create_table(
+        'application_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('resume_url', sa.String(length=250), nullable=True),
+        sa.Column('cover_letter', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('applied_at', sa.DateTime(), nullable=True),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('job_title', sa.String(length=150), nullable=True),
+        sa.Column('employer_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_application_archive_student_id_applied_at', 'application_archive',
+                    ['student_id', 'applied_at'])
+    op.create_index('ix_application_archive_employer_id_applied_at', 'application_archive',
+                    ['employer_id', 'applied_at'])
+    op.create_index('ix_application_archive_job_id', 'application_archive', ['job_id'])
+
+
+def downgrade():
+    op.drop_table('application_archive')
+    op.drop_table('job_archive')
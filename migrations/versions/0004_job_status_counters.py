@@ -0,0 +1,50 @@
+"""Счётчики откликов вакансии по статусам: applications_<статус>
+
+Заполняются из application и application_archive (как и агрегаты оценок,
+архивные отклики входят в итоги вакансии).
+
+Revision ID: 0004_job_status_counters
+Revises: 0003_archive_tables
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_job_status_counters'
+down_revision = '0003_archive_tables'
+branch_labels = None
+depends_on = None
+
+STATUSES = ('submitted', 'in_review', 'invited', 'rejected', 'accepted')
+
+
+def upgrade():
+    # без batch-режима: пересоздание таблицы job потеряло бы триггеры job_fts
+    for status in STATUSES:
+        op.add_column('job', sa.Column(f'applications_{status}', sa.Integer(), nullable=False,
+                                       server_default='0'))
+
+    op.execute("""
+        CREATE TEMP TABLE job_status_counts AS
+        SELECT job_id, status, COUNT(*) AS n FROM (
+            SELECT job_id, status FROM application
+            UNION ALL
+            SELECT job_id, status FROM application_archive
+        ) GROUP BY job_id, status
+    """)
+    op.execute("CREATE INDEX temp.ix_job_status_counts ON job_status_counts (job_id, status)")
+    for status in STATUSES:
+        op.execute(f"""
+            UPDATE job SET applications_{status} = COALESCE((
+                SELECT n FROM job_status_counts
+                WHERE job_status_counts.job_id = job.id AND job_status_counts.status = '{status}'), 0)
+        """)
+    op.execute("DROP TABLE job_status_counts")
+
+
+def downgrade():
+    for status in reversed(STATUSES):
+        op.drop_column('job', f'applications_{status}')
@@ -0,0 +1,66 @@
+"""AUTOINCREMENT для job и application
+
+Без него SQLite выдаёт новой строке max(id) + 1, и после архивации строки
+с наибольшим id её номер достаётся новой вакансии (отклику): в
+include_archived появляются два объекта с одним id, а повторная архивация
+падает на job_archive.id / application_archive.id.
+
+Таблицы пересоздаются (batch), после чего sqlite_sequence сдвигается за
+наибольший id и в рабочей, и в архивной таблице.
+
+Revision ID: 0005_autoincrement_ids
+Revises: 0004_job_status_counters
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_autoincrement_ids'
+down_revision = '0004_job_status_counters'
+branch_labels = None
+depends_on = None
+
+TABLES = (('job', 'job_archive'), ('application', 'application_archive'))
+
+# пересоздание job удаляет её триггеры; сам индекс job_fts (по rowid) остаётся верным
+FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN "
+    "INSERT INTO job_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN "
+    "INSERT INTO job_fts(job_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE OF title, description ON job BEGIN "
+    "INSERT INTO job_fts(job_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO job_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+
+def _rebuild(autoincrement):
+    for table, _ in TABLES:
+        with op.batch_alter_table(table, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+    for statement in FTS_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(True)
+    for table, archive in TABLES:
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(f"""
+            INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', MAX(
+                COALESCE((SELECT MAX(id) FROM {table}), 0),
+                COALESCE((SELECT MAX(id) FROM {archive}), 0))
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(False)
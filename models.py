@@ -1,7 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
-db = SQLAlchemy()
+from db_routing import RoutingSession
+
+# RoutingSession отправляет чтения GET-запросов на реплику, если она настроена
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -24,6 +27,17 @@ class User(db.Model):
 
 
 class Job(db.Model):
+    # Индексы под реальные запросы: список вакансий фильтрует по status
+    # (+ job_type) и сортирует по created_at; отклики работодателя идут через employer_id
+    __table_args__ = (
+        db.Index("ix_job_status_created_at", "status", "created_at"),
+        db.Index("ix_job_status_job_type_created_at", "status", "job_type", "created_at"),
+        db.Index("ix_job_employer_id", "employer_id"),
+        db.Index("ix_job_status_rating_score", "status", "rating_score"),
+        # AUTOINCREMENT: id заархивированной вакансии (job_archive.id) не выдаётся повторно
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -39,12 +53,34 @@ class Job(db.Model):
     # ⚡ Переименовываем колонку, чтобы не конфликтовала со старой таблицей rating
     job_rating = db.Column("job_rating", db.Float, default=None)
 
+    # Агрегаты оценок (ratings.py): обновляются одним UPDATE на каждую оценку.
+    # job_rating — среднее, rating_score — байесовское среднее для рейтинга вакансий
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_score = db.Column(db.Float, default=None)
+
+    # Отклики по статусам (dashboard.py): меняются в транзакциях самих откликов
+    applications_submitted = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    applications_in_review = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    applications_invited = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    applications_rejected = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    applications_accepted = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     def __repr__(self):
         return f"<Job {self.title}, rating={self.job_rating}>"
 
 
 
 class Application(db.Model):
+    __table_args__ = (
+        # один отклик студента на вакансию; проверка дубля — один проход по индексу
+        db.Index("uq_application_student_job", "student_id", "job_id", unique=True),
+        db.Index("ix_application_student_id_applied_at", "student_id", "applied_at"),
+        db.Index("ix_application_job_id_applied_at", "job_id", "applied_at"),
+        # как и у job: id не переиспользуется после переноса в application_archive
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     resume_url = db.Column(db.String(250))
     cover_letter = db.Column(db.Text)
@@ -62,3 +98,49 @@ class Application(db.Model):
     def __repr__(self):
         return f"<Application job_id={self.job_id}, student_id={self.student_id}, rating={self.rating}>"
 
+
+
+# Архив (archive.py): закрытые вакансии и завершённые отклики прошлых сезонов.
+# Строки переносятся сюда, чтобы рабочие таблицы и их индексы оставались маленькими.
+class ArchivedJob(db.Model):
+    __tablename__ = "job_archive"
+    __table_args__ = (
+        db.Index("ix_job_archive_status_created_at", "status", "created_at"),
+        db.Index("ix_job_archive_employer_id", "employer_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)  # тот же id, что был в job
+    title = db.Column(db.String(150), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    job_type = db.Column(db.String(50))
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    employer_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    job_rating = db.Column(db.Float)
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_score = db.Column(db.Float)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ArchivedApplication(db.Model):
+    __tablename__ = "application_archive"
+    __table_args__ = (
+        db.Index("ix_application_archive_student_id_applied_at", "student_id", "applied_at"),
+        db.Index("ix_application_archive_employer_id_applied_at", "employer_id", "applied_at"),
+        db.Index("ix_application_archive_job_id", "job_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)  # тот же id, что был в application
+    resume_url = db.Column(db.String(250))
+    cover_letter = db.Column(db.Text)
+    status = db.Column(db.String(20))
+    applied_at = db.Column(db.DateTime)
+    student_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # вакансия может быть и в job, и в job_archive — без внешнего ключа;
+    # название и работодатель скопированы, чтобы читать архив без JOIN
+    job_id = db.Column(db.Integer, nullable=False)
+    job_title = db.Column(db.String(150))
+    employer_id = db.Column(db.Integer, nullable=False)
+    rating = db.Column(db.Integer)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
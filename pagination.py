@@ -0,0 +1,146 @@
+# pagination.py
+"""Keyset-пагинация и потоковая выдача списков.
+
+Курсор — непрозрачная строка с ключом сортировки последней отданной строки.
+Следующая страница начинается строго после него, поэтому запрос всегда
+идёт по индексу и не зависит от глубины листания (в отличие от OFFSET).
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import DateTime, Integer, and_, or_
+
+from serializers import dumps
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _cursor_type(column):
+    """Какой тип значения курсора принимает столбец сортировки."""
+    if isinstance(column.type, DateTime):
+        return datetime
+    if isinstance(column.type, Integer):
+        return int
+    # bm25-ранг FTS (literal_column без типа) и прочие числовые ключи
+    return float
+
+
+def _valid_value(value, expected):
+    if expected is datetime:
+        return isinstance(value, datetime)
+    if isinstance(value, bool):
+        return False
+    if expected is int:
+        return isinstance(value, int)
+    return isinstance(value, (int, float))
+
+
+def decode_cursor(cursor, sort_keys=None):
+    """Значения ключей сортировки из курсора.
+
+    С sort_keys проверяет, что значений столько же, сколько ключей, и каждое
+    подходит своему столбцу: иначе подделанный курсор дошёл бы до SQL.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise ValueError(cursor)
+        values = [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in payload]
+    except (ValueError, TypeError, KeyError):
+        raise PaginationError("Некорректный курсор")
+    if sort_keys is not None and (
+            len(values) != len(sort_keys)
+            or not all(_valid_value(value, _cursor_type(column))
+                       for value, (column, _) in zip(values, sort_keys))):
+        raise PaginationError("Некорректный курсор")
+    return values
+
+
+def page_args(sort_keys=None):
+    """Читает limit/cursor из запроса. None — клиент не просил пагинацию.
+
+    sort_keys — сортировка списка, под которую проверяется курсор.
+    """
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limit is None and cursor is None:
+        return None
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise PaginationError("Некорректный параметр limit")
+    if limit < 1:
+        raise PaginationError("Некорректный параметр limit")
+    return min(limit, MAX_PAGE_SIZE), decode_cursor(cursor, sort_keys) if cursor else None
+
+
+def _after(sort_keys, values):
+    """Условие "строго после values" для сортировки sort_keys = [(column, descending)]."""
+    clauses = []
+    for i, (column, descending) in enumerate(sort_keys):
+        equal = [col == values[j] for j, (col, _) in enumerate(sort_keys[:i])]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def order_by_keys(query, sort_keys):
+    return query.order_by(*[col.desc() if descending else col.asc() for col, descending in sort_keys])
+
+
+def paginate(query, sort_keys, limit, cursor):
+    """Возвращает (rows, next_cursor).
+
+    Ключи сортировки добавляются в конец каждой строки; именованные столбцы
+    исходного запроса доступны в строках как обычно.
+    """
+    if cursor is not None:
+        if len(cursor) != len(sort_keys):
+            raise PaginationError("Некорректный курсор")
+        query = query.filter(_after(sort_keys, cursor))
+    n_keys = len(sort_keys)
+    query = order_by_keys(query.add_columns(*[col for col, _ in sort_keys]), sort_keys)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1][-n_keys:]))
+    return rows, next_cursor
+
+
+def stream_json_array(query, serialize, batch_size=STREAM_BATCH_SIZE):
+    """Отдаёт JSON-массив по частям, читая строки серверным курсором (yield_per).
+
+    Память не зависит от размера выборки: в каждый момент в процессе
+    живёт не больше одной пачки строк.
+    """
+    def generate():
+        yield b"["
+        chunk = []
+        first = True
+        for row in query.yield_per(batch_size):
+            chunk.append(dumps(serialize(row)))
+            if len(chunk) >= batch_size:
+                yield (b"" if first else b",") + b",".join(chunk)
+                first, chunk = False, []
+        if chunk:
+            yield (b"" if first else b",") + b",".join(chunk)
+        yield b"]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
@@ -0,0 +1,76 @@
+# passwords.py
+"""Хэширование паролей с ограничением параллельности.
+
+KDF (scrypt/pbkdf2) намеренно дорогой: при наплыве логинов в начале
+семестра такие вызовы занимают все потоки воркеров, и дешёвые запросы к API
+ждут. Поэтому хэширование идёт через общий пул из PASSWORD_HASH_CONCURRENCY
+потоков (hashlib отпускает GIL на время KDF), а очередь к нему ограничена
+PASSWORD_HASH_QUEUE: кто не дождался места за PASSWORD_HASH_WAIT секунд,
+получает HasherBusy, и обработчик отвечает 429.
+
+Параметры KDF задаёт PASSWORD_HASH_METHOD в формате werkzeug
+("scrypt:32768:8:1", "pbkdf2:sha256:600000"). Хэши со старыми
+параметрами пересчитываются при успешном входе (needs_rehash).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, method="scrypt:32768:8:1", concurrency=2, max_queue=32, wait=2.0):
+        self.method = method
+        self.wait = wait
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="password-hash")
+        # места: выполняемые + ждущие в очереди пула
+        self._slots = threading.BoundedSemaphore(concurrency + max_queue)
+        self._prefix = None
+        self.rejected = 0
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait):
+            self.rejected += 1
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True, если хэш посчитан не текущим методом или не с текущими параметрами."""
+        if self._prefix is None:
+            # werkzeug дополняет метод параметрами по умолчанию ("pbkdf2" -> "pbkdf2:sha256:N"):
+            # канонический вид берём из настоящего хэша
+            self._prefix = generate_password_hash("", self.method).split("$", 1)[0]
+        return stored_hash.split("$", 1)[0] != self._prefix
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+hasher = PasswordHasher()
+
+
+def init_passwords(app):
+    global hasher
+    hasher.shutdown()
+    hasher = PasswordHasher(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        concurrency=app.config["PASSWORD_HASH_CONCURRENCY"],
+        max_queue=app.config["PASSWORD_HASH_QUEUE"],
+        wait=app.config["PASSWORD_HASH_WAIT"],
+    )
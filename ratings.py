@@ -0,0 +1,80 @@
+# ratings.py
+"""Материализованные агрегаты оценок вакансий.
+
+Каждая оценка (rate_job, rate_application) меняет счётчики вакансии одним
+атомарным UPDATE за O(1): никакого пересчёта по всем откликам. Байесовское
+среднее rating_score притягивает вакансии с малым числом оценок к априорному
+среднему, чтобы одна пятёрка не ставила вакансию на первое место.
+"""
+from flask import current_app
+from sqlalchemy import case, func, select, union_all, update
+
+from models import db, Job, Application, ArchivedApplication
+
+
+def record_rating(job_id, new_rating, old_rating=None):
+    """Учитывает оценку new_rating (или её замену old_rating -> new_rating).
+
+    Выполняется в текущей транзакции; commit делает вызывающий.
+    Возвращает False, если вакансии нет.
+    """
+    prior_mean = current_app.config["RATING_PRIOR_MEAN"]
+    prior_weight = current_app.config["RATING_PRIOR_WEIGHT"]
+
+    delta_count = 0 if old_rating is not None else 1
+    delta_sum = new_rating - (old_rating or 0)
+    # в SET все выражения читают значения строки до обновления
+    count = Job.rating_count + delta_count
+    total = Job.rating_sum + delta_sum
+
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(
+            rating_count=count,
+            rating_sum=total,
+            job_rating=case((count > 0, total * 1.0 / count), else_=None),
+            rating_score=case(
+                (count > 0, (prior_weight * prior_mean + total) / (prior_weight + count)),
+                else_=None),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def recompute_rating_stats():
+    """Пересчитывает агрегаты всех вакансий из оценок откликов одним GROUP BY.
+
+    Учитываются и архивные отклики (archive.py). Для массовой загрузки
+    данных в обход обработчиков; оценки rate_job, не привязанные к
+    откликам, при пересчёте теряются.
+    """
+    prior_mean = current_app.config["RATING_PRIOR_MEAN"]
+    prior_weight = current_app.config["RATING_PRIOR_WEIGHT"]
+    ratings = union_all(
+        select(Application.job_id, Application.rating).where(Application.rating.isnot(None)),
+        select(ArchivedApplication.job_id, ArchivedApplication.rating)
+        .where(ArchivedApplication.rating.isnot(None)),
+    ).subquery()
+    stats = (
+        select(ratings.c.job_id,
+               func.count(ratings.c.rating).label("count"),
+               func.sum(ratings.c.rating).label("total"))
+        .group_by(ratings.c.job_id)
+        .subquery()
+    )
+    db.session.execute(
+        update(Job).values(rating_count=0, rating_sum=0, job_rating=None, rating_score=None)
+        .execution_options(synchronize_session=False))
+    # UPDATE ... FROM: одна агрегирующая выборка вместо подзапроса на каждую вакансию
+    db.session.execute(
+        update(Job)
+        .where(Job.id == stats.c.job_id)
+        .values(
+            rating_count=stats.c.count,
+            rating_sum=stats.c.total,
+            job_rating=stats.c.total * 1.0 / stats.c.count,
+            rating_score=(prior_weight * prior_mean + stats.c.total) / (prior_weight + stats.c.count),
+        )
+        .execution_options(synchronize_session=False))
@@ -0,0 +1,299 @@
+# recommend.py
+"""Рекомендации вакансий студенту по тексту title/description.
+
+Открытые вакансии лежат в памяти воркера разреженной матрицей SciPy
+(строка — вакансия, столбец — хэш слова, hashing trick без словаря).
+Профиль студента (факультет и вакансии, на которые он откликался)
+превращается в такой же вектор, и все вакансии оцениваются одним
+произведением матрицы на вектор: берутся только столбцы слов профиля
+(CSC), поэтому стоимость — число ненулей в этих столбцах, а не вся матрица.
+
+Строки хранят нормированный TF (1 + log tf) без IDF; IDF применяется
+к вектору профиля при каждом запросе. Так добавление вакансии не требует
+пересчёта остальных строк — меняются только счётчики df.
+
+Индекс обновляется инкрементально из jobs()/job_actions() этого воркера:
+новые строки копятся в маленькой матрице и сливаются с основной пачками,
+закрытые и удалённые вакансии помечаются неактивными до уплотнения.
+Изменения, сделанные другими воркерами, подхватываются полной
+перестройкой в фоне раз в RECOMMEND_REFRESH_SECONDS.
+
+numpy и scipy — необязательные зависимости: без них available() == False
+и GET /api/jobs/recommended отвечает 503.
+"""
+import re
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # необязательная зависимость
+    np = sparse = None
+
+from models import db, Job, Application
+
+JOB_TYPES = ("internship", "practice", "job")
+# первые курсы чаще ищут практику, старшие — стажировку или работу
+JOB_TYPE_BY_COURSE = {"1": "practice", "2": "practice", "3": "internship", "4": "internship",
+                      "5": "job", "6": "job"}
+JOB_TYPE_BOOST = 1.2
+MERGE_THRESHOLD = 1000
+COMPACT_DEAD_SHARE = 0.2
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def available():
+    return np is not None
+
+
+class JobIndex:
+    def __init__(self, n_features=2 ** 18, title_weight=3.0, max_terms=64):
+        self.n_features = n_features
+        self.title_weight = title_weight
+        self.max_terms = max_terms
+        self.lock = threading.RLock()
+        self.built_at = None
+        self._reset()
+
+    def _reset(self):
+        self.matrix = None          # CSC: строки — слоты вакансий
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.job_types = np.zeros(0, dtype=np.int8)
+        self.active = np.zeros(0, dtype=bool)
+        self.df = np.zeros(self.n_features, dtype=np.int32)
+        self.slots = {}             # job_id -> номер строки
+        self.pending = []           # [(job_id, job_type, cols, vals)] ещё не в matrix
+        self._pending_matrix = None
+
+    # --- векторизация ---------------------------------------------------
+
+    def term_counts(self, title, description, counts=None, weight=1.0):
+        counts = {} if counts is None else counts
+        mask = self.n_features - 1
+        for text, w in ((title, self.title_weight * weight), (description, weight)):
+            for token in _TOKEN_RE.findall((text or "").lower()):
+                # crc32, а не hash(): одинаковые столбцы во всех процессах
+                col = zlib.crc32(token.encode()) & mask
+                counts[col] = counts.get(col, 0.0) + w
+        return counts
+
+    @staticmethod
+    def normalize(counts):
+        cols = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        vals = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        norm = np.linalg.norm(vals)
+        return cols, (vals / norm if norm else vals).astype(np.float32)
+
+    # --- построение и изменения -----------------------------------------
+
+    def build(self, rows):
+        """rows — (id, title, description, job_type) открытых вакансий."""
+        indptr, indices, data, job_ids, job_types = [0], [], [], [], []
+        for job_id, title, description, job_type in rows:
+            cols, vals = self.normalize(self.term_counts(title, description))
+            indices.append(cols)
+            data.append(vals)
+            indptr.append(indptr[-1] + len(cols))
+            job_ids.append(job_id)
+            job_types.append(_type_code(job_type))
+
+        with self.lock:
+            self._reset()
+            indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32)
+            data = np.concatenate(data) if data else np.zeros(0, dtype=np.float32)
+            self.matrix = sparse.csr_matrix((data, indices, np.asarray(indptr)),
+                                            shape=(len(job_ids), self.n_features)).tocsc()
+            self.job_ids = np.asarray(job_ids, dtype=np.int64)
+            self.job_types = np.asarray(job_types, dtype=np.int8)
+            self.active = np.ones(len(job_ids), dtype=bool)
+            self.df = np.bincount(indices, minlength=self.n_features).astype(np.int32)
+            self.slots = {job_id: slot for slot, job_id in enumerate(job_ids)}
+            self.built_at = time.monotonic()
+
+    @property
+    def ready(self):
+        return self.built_at is not None
+
+    def upsert(self, job_id, title, description, job_type):
+        cols, vals = self.normalize(self.term_counts(title, description))
+        with self.lock:
+            if not self.ready:
+                return
+            self._deactivate(job_id)
+            self.slots[job_id] = self.matrix.shape[0] + len(self.pending)
+            self.pending.append((job_id, _type_code(job_type), cols, vals))
+            self._pending_matrix = None
+            self.df[cols] += 1
+            if len(self.pending) >= MERGE_THRESHOLD:
+                self._merge()
+
+    def remove(self, job_id):
+        with self.lock:
+            if self.ready:
+                self._deactivate(job_id)
+
+    def _deactivate(self, job_id):
+        slot = self.slots.pop(job_id, None)
+        if slot is None:
+            return
+        if slot < len(self.active):
+            self.active[slot] = False
+            if np.count_nonzero(~self.active) > COMPACT_DEAD_SHARE * len(self.active):
+                self._compact()
+        else:
+            # ещё в pending: просто выбрасываем строку
+            row = self.pending.pop(slot - len(self.active))
+            self.df[row[2]] -= 1
+            self._pending_matrix = None
+            for i, (pending_id, *_) in enumerate(self.pending):
+                self.slots[pending_id] = len(self.active) + i
+
+    def _pending_as_matrix(self):
+        if self._pending_matrix is None:
+            indptr = np.cumsum([0] + [len(row[2]) for row in self.pending])
+            indices = np.concatenate([row[2] for row in self.pending])
+            data = np.concatenate([row[3] for row in self.pending])
+            self._pending_matrix = sparse.csr_matrix(
+                (data, indices, indptr), shape=(len(self.pending), self.n_features)).tocsc()
+        return self._pending_matrix
+
+    def _merge(self):
+        if not self.pending:
+            return
+        self.matrix = sparse.vstack([self.matrix, self._pending_as_matrix()], format="csc")
+        self.job_ids = np.concatenate([self.job_ids, [row[0] for row in self.pending]]).astype(np.int64)
+        self.job_types = np.concatenate([self.job_types, [row[1] for row in self.pending]]).astype(np.int8)
+        self.active = np.concatenate([self.active, np.ones(len(self.pending), dtype=bool)])
+        self.pending, self._pending_matrix = [], None
+
+    def _compact(self):
+        self._merge()
+        keep = np.flatnonzero(self.active)
+        self.matrix = self.matrix.tocsr()[keep].tocsc()
+        self.job_ids = self.job_ids[keep]
+        self.job_types = self.job_types[keep]
+        self.active = np.ones(len(keep), dtype=bool)
+        self.df = np.diff(self.matrix.indptr).astype(np.int32)
+        self.slots = {int(job_id): slot for slot, job_id in enumerate(self.job_ids)}
+
+    # --- оценка ---------------------------------------------------------
+
+    def recommend(self, counts, k, exclude=(), preferred_type=None):
+        """Top-k (job_id, score) для профиля counts ({столбец: вес})."""
+        if not counts:
+            return []
+        cols, vals = self.normalize(counts)
+        with self.lock:
+            n_docs = self.matrix.shape[0] + len(self.pending)
+            idf = np.log((1.0 + n_docs) / (1.0 + self.df[cols])) + 1.0
+            weights = vals * idf * idf
+            if len(cols) > self.max_terms:
+                # самые весомые термы профиля; частые слова с малым IDF — самые
+                # длинные столбцы, а вклада в оценку почти не дают
+                top = np.argpartition(-weights, self.max_terms - 1)[:self.max_terms]
+                cols, weights = cols[top], weights[top]
+            scores = self.matrix[:, cols] @ weights
+            job_ids, job_types, active = self.job_ids, self.job_types, self.active
+            if self.pending:
+                scores = np.concatenate([scores, self._pending_as_matrix()[:, cols] @ weights])
+                job_ids = np.concatenate([job_ids, [row[0] for row in self.pending]])
+                job_types = np.concatenate([job_types, [row[1] for row in self.pending]])
+                active = np.concatenate([active, np.ones(len(self.pending), dtype=bool)])
+
+        if preferred_type is not None:
+            scores = np.where(job_types == _type_code(preferred_type), scores * JOB_TYPE_BOOST, scores)
+        scores = np.where(active, scores, 0.0)
+        if exclude:
+            scores[np.isin(job_ids, np.fromiter(exclude, dtype=np.int64))] = 0.0
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(job_ids[i]), float(scores[i])) for i in top]
+
+    def stats(self):
+        with self.lock:
+            if not self.ready:
+                return {"ready": False}
+            return {"ready": True, "jobs": len(self.slots), "rows": self.matrix.shape[0] + len(self.pending),
+                    "nnz": int(self.matrix.nnz), "pending": len(self.pending)}
+
+
+def _type_code(job_type):
+    return JOB_TYPES.index(job_type) if job_type in JOB_TYPES else -1
+
+
+index = JobIndex() if available() else None
+_refreshing = threading.Lock()
+
+
+def open_job_rows():
+    return db.session.query(Job.id, Job.title, Job.description, Job.job_type) \
+        .filter(Job.status == "open").yield_per(5000)
+
+
+def ensure_index(app):
+    """Строит индекс при первом обращении; устаревший перестраивает в фоне."""
+    if not index.ready:
+        with _refreshing:
+            if not index.ready:
+                index.build(open_job_rows())
+        return
+    if time.monotonic() - index.built_at < app.config["RECOMMEND_REFRESH_SECONDS"]:
+        return
+    if _refreshing.acquire(blocking=False):
+        def rebuild():
+            try:
+                with app.app_context():
+                    index.build(open_job_rows())
+            finally:
+                _refreshing.release()
+        threading.Thread(target=rebuild, name="recommend-rebuild", daemon=True).start()
+
+
+def job_saved(job_id, title, description, job_type, status="open"):
+    """Вызывается после commit создания или правки вакансии."""
+    if index is None:
+        return
+    if status == "open":
+        index.upsert(job_id, title, description, job_type)
+    else:
+        index.remove(job_id)
+
+
+def job_removed(job_id):
+    if index is not None:
+        index.remove(job_id)
+
+
+def profile_counts(user, history):
+    """Вектор профиля: факультет и вакансии, на которые студент откликался."""
+    counts = {}
+    if user.faculty:
+        index.term_counts(None, user.faculty, counts)
+    applied = db.session.query(Application.job_id, Job.title, Job.description) \
+        .join(Job, Application.job_id == Job.id) \
+        .filter(Application.student_id == user.id) \
+        .order_by(Application.applied_at.desc()).limit(history).all()
+    for _, title, description in applied:
+        index.term_counts(title, description, counts)
+    return counts, {job_id for job_id, _, _ in applied}
+
+
+def recommend_for(user, k, history):
+    counts, applied = profile_counts(user, history)
+    return index.recommend(counts, k, exclude=applied,
+                           preferred_type=JOB_TYPE_BY_COURSE.get((user.course or "").strip()))
+
+
+def init_recommendations(app):
+    global index
+    if available():
+        index = JobIndex(n_features=app.config["RECOMMEND_FEATURES"],
+                         title_weight=app.config["RECOMMEND_TITLE_WEIGHT"],
+                         max_terms=app.config["RECOMMEND_MAX_TERMS"])
@@ -0,0 +1,188 @@
+# response_cache.py
+"""Кэш готовых ответов для горячих GET-запросов со строгими ETag.
+
+Ключ ответа включает номер поколения пространства имён ("jobs").
+Любая запись в вакансии увеличивает поколение — старые записи просто
+перестают находиться и вытесняются по LRU, явная чистка не нужна.
+
+Бэкенды:
+    memory — словарь в процессе с LRU-вытеснением и TTL (по умолчанию при
+             одном воркере). Поколения тоже свои у каждого процесса, поэтому
+             в остальных воркерах ответ устаревает не дольше чем на TTL;
+    sqlite — общий файл SQLite: локальная замена Redis/memcached, через
+             который несколько воркеров gunicorn делят и ответы, и поколения.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from flask import make_response, request
+
+from cache import LRUCache
+from db_routing import use_primary
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=1024, ttl=None):
+        self._entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value):
+        self._entries.set(key, value)
+
+    def counter(self, name):
+        return self._counters.get(name, 0)
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self):
+        self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Общий для процессов кэш в файле SQLite (WAL, соединение на поток)."""
+
+    def __init__(self, path, maxsize=1024):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                         "key TEXT PRIMARY KEY, etag TEXT, body BLOB, mimetype TEXT, stored_at REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT etag, body, mimetype FROM entries WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def set(self, key, value):
+        etag, body, mimetype = value
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                     (key, etag, body, mimetype, time.time()))
+        conn.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                     "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)", (self.maxsize,))
+
+    def counter(self, name):
+        row = self._connect().execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, name):
+        conn = self._connect()
+        conn.execute("INSERT INTO counters VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+        return self.counter(name)
+
+    def clear(self):
+        self._connect().execute("DELETE FROM entries")
+
+    def size(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def generation(self, namespace):
+        return self.backend.counter(f"generation:{namespace}")
+
+    def invalidate(self, namespace):
+        """Вызывается после commit любой записи, влияющей на namespace."""
+        return self.backend.incr(f"generation:{namespace}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def respond(self, namespace, key_parts, build):
+        """Отдаёт закэшированный ответ или строит его через build().
+
+        Поколение читается до построения ответа: если запись случится
+        посередине, результат ляжет под старое поколение и не будет найден.
+        Строится ответ по основной базе: отстающая реплика положила бы
+        под новое поколение данные до записи.
+        """
+        key = f"{namespace}:{self.generation(namespace)}:{key_parts!r}"
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            with use_primary():
+                response = make_response(build())
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = (hashlib.sha256(body).hexdigest()[:32], body, response.mimetype)
+            self.backend.set(key, entry)
+        else:
+            self.hits += 1
+
+        etag, body, mimetype = entry
+        response = make_response(body)
+        response.mimetype = mimetype
+        response.set_etag(etag)
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def value(self, namespace, key_parts, compute):
+        """Кэширует не ответ, а JSON-совместимое значение под тем же поколением.
+
+        Для частей ответа, которые переиспользуются разными ответами
+        (например, фасеты для всех страниц списка).
+        """
+        key = f"{namespace}:{self.generation(namespace)}:value:{key_parts!r}"
+        entry = self.backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            return json.loads(entry[1])
+        self.misses += 1
+        with use_primary():
+            result = compute()
+        self.backend.set(key, (None, json.dumps(result).encode(), "application/json"))
+        return result
+
+    def stats(self):
+        return {
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def init_response_cache(app):
+    size = app.config["RESPONSE_CACHE_SIZE"]
+    if app.config["RESPONSE_CACHE_BACKEND"] == "sqlite":
+        response_cache.backend = SQLiteBackend(app.config["RESPONSE_CACHE_PATH"], maxsize=size)
+    else:
+        response_cache.backend = MemoryBackend(maxsize=size, ttl=app.config["RESPONSE_CACHE_TTL"])
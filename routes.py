@@ -1,51 +1,165 @@
-from flask import Flask, jsonify, request, url_for, session, render_template, redirect, Blueprint
+from flask import Flask, Response, jsonify, request, url_for, session, render_template, redirect, Blueprint, current_app
 from flask_cors import CORS
-from models import db, User, Job, Application
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from models import db, User, Job, Application, ArchivedJob, ArchivedApplication
+from auth import current_user, invalidate_user, login_user, logout_user, user_cache
+from response_cache import response_cache
+from ratings import record_rating
+from archive import include_archived, with_archived
+from search import apply_keyword_filter, like_filter
+from sqlite_tuning import retry_on_busy
+from pagination import PaginationError, order_by_keys, page_args, paginate, stream_json_array
+from serializers import (JOB, TOP_JOB, ARCHIVED_JOB, APPLICATION_FOR_EMPLOYER, APPLICATION_FOR_STUDENT,
+                         ARCHIVED_APPLICATION, APPLICATION_EXPORT, Employer, Student, json_response)
+from export import FORMATS as EXPORT_FORMATS, stream_export
+import events
+import recommend
+import group_commit
+import passwords
+import db_routing
+from facets import job_facets
+from dashboard import APPLICATION_STATUSES, employer_dashboard, record_applications, record_status_changes
 from datetime import datetime
 
 routes_bp = Blueprint('routes', __name__)
 CORS(routes_bp, resources={r"/*": {"origins": "*"}})
 
+JOB_STATUSES = ["open", "closed"]
+
+# Порядок выдачи списков: сначала новые. По этим же ключам строится курсор.
+JOB_SORT_KEYS = [(Job.created_at, True), (Job.id, True)]
+APPLICATION_SORT_KEYS = [(Application.applied_at, True), (Application.id, True)]
+
+
+def wants_stream():
+    return request.args.get('stream') in ('1', 'true')
+
+
+def wants_facets():
+    return request.args.get('facets') in ('1', 'true')
+
+
+# Списки читаются одним запросом с JOIN и только нужными столбцами
+# (serializers.py): никаких ленивых загрузок job.employer / app.student на каждую строку.
+def job_query(projection=JOB):
+    return db.session.query(*projection.columns) \
+        .outerjoin(Employer, Job.employer_id == Employer.id)
+
+
+def application_query(projection):
+    return db.session.query(*projection.columns) \
+        .outerjoin(Job, Application.job_id == Job.id) \
+        .outerjoin(Student, Application.student_id == Student.id) \
+        .outerjoin(Employer, Job.employer_id == Employer.id)
+
+
+# архив (archive.py): те же ключи ответа, название вакансии и работодатель скопированы в строку
+def archived_job_query():
+    return db.session.query(*ARCHIVED_JOB.columns) \
+        .outerjoin(Employer, ArchivedJob.employer_id == Employer.id)
+
+
+def archived_application_query():
+    return db.session.query(*ARCHIVED_APPLICATION.columns) \
+        .outerjoin(Student, ArchivedApplication.student_id == Student.id) \
+        .outerjoin(Employer, ArchivedApplication.employer_id == Employer.id)
+
+
+def check_bulk_items(items):
+    if not isinstance(items, list) or not items:
+        return 'Ожидается непустой массив'
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return f"Не больше {current_app.config['BULK_MAX_ITEMS']} элементов за запрос"
+    return None
+
+
+def is_id(value):
+    """Целый id из JSON; true/false — тоже int в Python, но не id."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_job_item(item):
+    if not isinstance(item, dict):
+        return 'Ожидается объект'
+    for field in ('title', 'description'):
+        if not isinstance(item.get(field), str) or not item[field].strip():
+            return f'Поле {field} обязательно'
+    if len(item['title']) > 150:
+        return 'Слишком длинное название'
+    if not isinstance(item.get('job_type', 'internship'), str):
+        return 'Некорректный job_type'
+    return None
+
+
+def job_list_cache_key():
+    """Нормализованные параметры списка вакансий — ключ кэша ответов."""
+    args = request.args
+    keyword = (args.get('q') or '').strip()
+    return (args.get('status', 'open'), args.get('job_type') or None, keyword or None,
+            args.get('limit'), args.get('cursor'), include_archived(), wants_facets())
+
+
+def list_jobs():
+    job_type = request.args.get('job_type')
+    status = request.args.get('status', 'open')
+    keyword = (request.args.get('q') or '').strip()
+
+    query = job_query().filter(Job.status == status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    sort_keys = JOB_SORT_KEYS
+    if include_archived():
+        archived = archived_job_query().filter(ArchivedJob.status == status)
+        if job_type:
+            archived = archived.filter(ArchivedJob.job_type == job_type)
+        if keyword:
+            # у архива нет FTS: ILIKE по обеим частям, порядок — по дате
+            query = query.filter(like_filter(Job, keyword))
+            archived = archived.filter(like_filter(ArchivedJob, keyword))
+        query = with_archived(query, archived)
+    elif keyword:
+        # FTS5: ранжирование по релевантности и поиск по префиксу
+        query, sort_keys = apply_keyword_filter(query, keyword, sort_keys)
+
+    if wants_stream():
+        return stream_json_array(order_by_keys(query, sort_keys), JOB.to_dict)
+
+    try:
+        page = page_args(sort_keys)
+        if page:
+            rows, next_cursor = paginate(query, sort_keys, *page)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    # ?facets=1 — ответ-объект {"items": ..., "facets": {"status": {...}, "job_type": {...}}}
+    facets = job_facets(keyword, status, job_type, include_archived()) if wants_facets() else None
+    if page:
+        body = {'items': JOB.serialize(rows), 'next_cursor': next_cursor}
+    else:
+        rows = order_by_keys(query, sort_keys).all()
+        if facets is None:
+            return json_response(JOB.serialize(rows))
+        body = {'items': JOB.serialize(rows)}
+    if facets is not None:
+        body['facets'] = facets
+    return json_response(body)
+
 
 # ВАКАНСИИ (Job)
 @routes_bp.route('/api/jobs', methods=['GET', 'POST'])
+@retry_on_busy
 def jobs():
     if request.method == 'GET':
-        job_type = request.args.get('job_type')
-        status = request.args.get('status', 'open')
-        keyword = request.args.get('q')
-
-        query = Job.query.filter_by(status=status)
-        if job_type:
-            query = query.filter_by(job_type=job_type)
-        if keyword:
-            query = query.filter(
-                (Job.title.ilike(f"%{keyword}%")) |
-                (Job.description.ilike(f"%{keyword}%"))
-            )
-
-        jobs = query.all()
-
-        job_list = []
-        for job in jobs:
-            job_list.append({
-                'id': job.id,
-                'title': job.title,
-                'description': job.description,
-                'job_type': job.job_type,
-                'status': job.status,
-                'created_at': job.created_at.isoformat(),
-                'employer': job.employer.username if job.employer else None
-            })
-
-        return jsonify(job_list)
+        # ?stream=1 — полный список без пагинации, но в постоянной памяти
+        if wants_stream():
+            return list_jobs()
+        return response_cache.respond('jobs', job_list_cache_key(), list_jobs)
 
     elif request.method == 'POST':
         if 'username' not in session:
             return jsonify({'error': 'Необходима авторизация'}), 401
 
-        user = User.query.filter_by(username=session['username']).first()
+        user = current_user()
         if not user or user.role != "employer":
             return jsonify({'error': 'Только работодатель может создавать вакансии'}), 403
 
@@ -54,40 +168,154 @@ def jobs():
             title=data.get('title'),
             description=data.get('description'),
             job_type=data.get('job_type', 'internship'),
-            employer=user
+            employer_id=user.id
         )
         db.session.add(new_job)
         db.session.commit()
+        response_cache.invalidate('jobs')
+        recommend.job_saved(new_job.id, new_job.title, new_job.description, new_job.job_type)
         return jsonify({'message': 'Вакансия создана', 'id': new_job.id}), 201
 
 
+@routes_bp.route('/api/jobs/bulk', methods=['POST'])
+@retry_on_busy
+def bulk_create_jobs():
+    """Массовое создание вакансий: массив объектов как у POST /api/jobs.
+
+    Все элементы проверяются заранее, корректные вставляются одним
+    executemany в одной транзакции. Ответ — результат по каждому элементу.
+    """
+    if 'username' not in session:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    user = current_user()
+    if not user or user.role != "employer":
+        return jsonify({'error': 'Только работодатель может создавать вакансии'}), 403
+
+    items = request.get_json(silent=True)
+    error = check_bulk_items(items)
+    if error:
+        return jsonify({'error': error}), 400
+
+    results, rows = [], []
+    for index, item in enumerate(items):
+        error = validate_job_item(item)
+        if error:
+            results.append({'index': index, 'error': error})
+            continue
+        results.append({'index': index})
+        rows.append({
+            'title': item['title'],
+            'description': item['description'],
+            'job_type': item.get('job_type', 'internship'),
+            'employer_id': user.id,
+        })
+
+    if rows:
+        ids = db.session.scalars(
+            insert(Job).returning(Job.id, sort_by_parameter_order=True), rows).all()
+        db.session.commit()
+        response_cache.invalidate('jobs')
+        for job_id, row in zip(ids, rows):
+            recommend.job_saved(job_id, row['title'], row['description'], row['job_type'])
+        created = iter(ids)
+        for result in results:
+            if 'error' not in result:
+                result['id'] = next(created)
+
+    return jsonify({'created': len(rows), 'results': results}), 201 if rows else 400
+
+
+TOP_JOBS_DEFAULT = 10
+TOP_JOBS_MAX = 100
+
+
+@routes_bp.route('/api/jobs/top', methods=['GET'])
+def top_jobs():
+    """Лучшие открытые вакансии по байесовскому рейтингу (индекс status + rating_score)"""
+    try:
+        limit = min(int(request.args.get('limit', TOP_JOBS_DEFAULT)), TOP_JOBS_MAX)
+    except ValueError:
+        return jsonify({'error': 'Некорректный параметр limit'}), 400
+    if limit < 1:
+        return jsonify({'error': 'Некорректный параметр limit'}), 400
+
+    def build():
+        rows = job_query(TOP_JOB) \
+            .filter(Job.status == 'open', Job.rating_score.isnot(None)) \
+            .order_by(Job.rating_score.desc(), Job.id.desc()) \
+            .limit(limit).all()
+        return json_response(TOP_JOB.serialize(rows))
+
+    return response_cache.respond('jobs', ('top', limit), build)
+
+
+RECOMMENDED_DEFAULT = 20
+RECOMMENDED_MAX = 100
+
+
+@routes_bp.route('/api/jobs/recommended', methods=['GET'])
+def recommended_jobs():
+    """Лента «рекомендованные стажировки» для студента (recommend.py)."""
+    if 'username' not in session:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    user = current_user()
+    if not user or user.role != "student":
+        return jsonify({'error': 'Рекомендации доступны только студентам'}), 403
+    try:
+        limit = min(int(request.args.get('limit', RECOMMENDED_DEFAULT)), RECOMMENDED_MAX)
+    except ValueError:
+        return jsonify({'error': 'Некорректный параметр limit'}), 400
+    if limit < 1:
+        return jsonify({'error': 'Некорректный параметр limit'}), 400
+    if not recommend.available():
+        return jsonify({'error': 'Рекомендации недоступны: не установлены numpy/scipy'}), 503
+
+    recommend.ensure_index(current_app._get_current_object())
+    scored = recommend.recommend_for(user, limit, current_app.config['RECOMMEND_HISTORY'])
+    if not scored:
+        # пустой профиль: вместо рекомендаций — свежие открытые вакансии
+        rows = order_by_keys(job_query().filter(Job.status == 'open'), JOB_SORT_KEYS).limit(limit).all()
+        return json_response([dict(JOB.to_dict(row), score=None) for row in rows])
+
+    scores = dict(scored)
+    rows = job_query().filter(Job.id.in_(scores), Job.status == 'open').all()
+    rows.sort(key=lambda row: -scores[row.id])
+    return json_response([dict(JOB.to_dict(row), score=round(scores[row.id], 4)) for row in rows])
+
+
 @routes_bp.route('/api/jobs/<int:job_id>', methods=['GET', 'DELETE', 'PUT'])
+@retry_on_busy
 def job_actions(job_id):
+    if request.method == 'GET':
+        archived = include_archived()
+
+        def get_job():
+            row = job_query().filter(Job.id == job_id).first()
+            if not row and archived:
+                row = archived_job_query().filter(ArchivedJob.id == job_id).first()
+            if not row:
+                return jsonify({'error': 'Вакансия не найдена'}), 404
+            return json_response(JOB.to_dict(row))
+        return response_cache.respond('jobs', ('job', job_id, archived), get_job)
+
     job = Job.query.get(job_id)
     if not job:
         return jsonify({'error': 'Вакансия не найдена'}), 404
 
-    if request.method == 'GET':
-        return jsonify({
-            'id': job.id,
-            'title': job.title,
-            'description': job.description,
-            'job_type': job.job_type,
-            'status': job.status,
-            'created_at': job.created_at.isoformat(),
-            'employer': job.employer.username if job.employer else None
-        })
-
-    elif request.method == 'DELETE':
+    if request.method == 'DELETE':
         if 'username' not in session:
             return jsonify({'error': 'Необходима авторизация'}), 401
 
-        user = User.query.filter_by(username=session['username']).first()
+        user = current_user()
         if not user or user.role != "employer" or job.employer_id != user.id:
             return jsonify({'error': 'Удалять может только работодатель свою вакансию'}), 403
 
         db.session.delete(job)
         db.session.commit()
+        response_cache.invalidate('jobs')
+        recommend.job_removed(job_id)
         return jsonify({'message': 'Вакансия удалена'})
 
     # редактирование
@@ -95,16 +323,22 @@ def job_actions(job_id):
         if 'username' not in session:
             return jsonify({'error': 'Необходима авторизация'}), 401
 
-        user = User.query.filter_by(username=session['username']).first()
+        user = current_user()
         if not user or user.role != "employer" or job.employer_id != user.id:
             return jsonify({'error': 'Редактировать может только работодатель свою вакансию'}), 403
 
         data = request.get_json()
+        if data.get('status', job.status) not in JOB_STATUSES:
+            return jsonify({'error': 'Недопустимый статус'}), 400
         job.title = data.get('title', job.title)
         job.description = data.get('description', job.description)
         job.job_type = data.get('job_type', job.job_type)
+        # закрытые вакансии пропадают из списка по умолчанию и со временем уходят в архив
+        job.status = data.get('status', job.status)
 
         db.session.commit()
+        response_cache.invalidate('jobs')
+        recommend.job_saved(job.id, job.title, job.description, job.job_type, job.status)
         return jsonify({'message': 'Вакансия обновлена'})
 
 
@@ -113,11 +347,12 @@ def job_actions(job_id):
 # ОТКЛИКИ (Application)
 # -------------------------------
 @routes_bp.route('/api/jobs/<int:job_id>/apply', methods=['POST'])
+@retry_on_busy
 def apply(job_id):
     if 'username' not in session:
         return jsonify({'error': 'Необходима авторизация'}), 401
 
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user or user.role != "student":
         return jsonify({'error': 'Только студент может подавать заявки'}), 403
 
@@ -126,16 +361,44 @@ def apply(job_id):
         return jsonify({'error': 'Вакансия не найдена'}), 404
 
     data = request.get_json()
-    new_app = Application(
-        resume_url=data.get('resume_url'),
-        cover_letter=data.get('cover_letter'),
-        student=user,
-        job=job
-    )
-    db.session.add(new_app)
-    db.session.commit()
-
-    return jsonify({'message': 'Заявка подана', 'application_id': new_app.id}), 201
+    if group_commit.writer is not None:
+        employer_id = job.employer_id
+        # ожидание пачки не должно держать транзакцию чтения этого запроса
+        db.session.rollback()
+        try:
+            app_id = group_commit.submit_application({
+                'resume_url': data.get('resume_url'),
+                'cover_letter': data.get('cover_letter'),
+                'student_id': user.id,
+                'job_id': job_id,
+            }, current_app.config['GROUP_COMMIT_TIMEOUT'])
+        except group_commit.DuplicateApplication:
+            return jsonify({'error': 'Вы уже откликнулись на эту вакансию'}), 409
+        except group_commit.WriterBusy:
+            return jsonify({'error': 'База данных занята, повторите запрос'}), 503
+        # запись прошла мимо db.session: закрепляем клиента за основной базой сами
+        db_routing.mark_written()
+    else:
+        new_app = Application(
+            resume_url=data.get('resume_url'),
+            cover_letter=data.get('cover_letter'),
+            student_id=user.id,
+            job=job
+        )
+        db.session.add(new_app)
+        try:
+            db.session.flush()
+            record_applications({job_id: 1})
+            db.session.commit()
+        except IntegrityError:
+            # дубль отсекает уникальный индекс (student_id, job_id)
+            db.session.rollback()
+            return jsonify({'error': 'Вы уже откликнулись на эту вакансию'}), 409
+        app_id, employer_id = new_app.id, job.employer_id
+
+    events.publish(employer_id, 'application_created', {
+        'id': app_id, 'job_id': job_id, 'student': user.username})
+    return jsonify({'message': 'Заявка подана', 'application_id': app_id}), 201
 
 
 @routes_bp.route('/api/applications', methods=['GET'])
@@ -143,49 +406,127 @@ def get_applications():
     if 'username' not in session:
         return jsonify({'error': 'Необходима авторизация'}), 401
 
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
 
+    projection = APPLICATION_FOR_EMPLOYER if user.role == "employer" else APPLICATION_FOR_STUDENT
+    query = application_query(projection)
+    # архив фильтруется теми же ветками ролей, что и рабочая таблица:
+    # прочие роли, как и раньше, видят все отклики — и живые, и архивные
+    archived = archived_application_query() if include_archived() else None
     if user.role == "student":
-        apps = Application.query.filter_by(student_id=user.id).all()
+        query = query.filter(Application.student_id == user.id)
+        if archived is not None:
+            archived = archived.filter(ArchivedApplication.student_id == user.id)
     elif user.role == "employer":
-        jobs = Job.query.filter_by(employer_id=user.id).all()
-        job_ids = [job.id for job in jobs]
-        apps = Application.query.filter(Application.job_id.in_(job_ids)).all()
-    else:
-        apps = Application.query.all()
-
-    app_list = []
-    for app in apps:
-        app_list.append({
-            'id': app.id,
-            'job_id': app.job_id,
-            'job_title': app.job.title if app.job else None,
-            #  студент
-            'student': app.student.username if app.student else None,
-            'student_full_name': app.student.full_name if app.student else "",
-            'student_course': app.student.course if app.student else "",
-            'student_faculty': app.student.faculty if app.student else "",
-            #  работодатель (берём у вакансии -> employer -> organization)
-            'organization': app.job.employer.organization if app.job and app.job.employer else "",
-            'resume_url': app.resume_url,
-            'cover_letter': app.cover_letter,
-            'status': app.status,
-            'applied_at': app.applied_at.isoformat(),
-            'can_manage': (user.role == "employer")
-        })
+        query = query.filter(Job.employer_id == user.id)
+        if archived is not None:
+            archived = archived.filter(ArchivedApplication.employer_id == user.id)
+    if archived is not None:
+        query = with_archived(query, archived)
+
+    if wants_stream():
+        return stream_json_array(order_by_keys(query, APPLICATION_SORT_KEYS), projection.to_dict)
+
+    try:
+        page = page_args(APPLICATION_SORT_KEYS)
+        if page:
+            rows, next_cursor = paginate(query, APPLICATION_SORT_KEYS, *page)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    if page:
+        return json_response({'items': projection.serialize(rows), 'next_cursor': next_cursor})
+
+    rows = order_by_keys(query, APPLICATION_SORT_KEYS).all()
+    return json_response(projection.serialize(rows))
+
+
+# -------------------------------
+# УВЕДОМЛЕНИЯ (SSE)
+# -------------------------------
+@routes_bp.route('/api/events', methods=['GET'])
+def event_stream():
+    """Поток событий текущего пользователя (events.py) вместо опроса /api/applications.
+
+    Студент получает application_status, работодатель — application_created
+    и application_rated. Событие resync — перечитать список целиком.
+    """
+    if 'username' not in session:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    user = current_user()
+    # подписка до ответа: события между этим местом и первым чтением не теряются
+    subscription = events.subscribe(user.id)
+    stream = events.event_stream(subscription, current_app.config['EVENTS_HEARTBEAT'])
+    # без stream_with_context: открытый поток не держит контекст запроса и соединение с БД
+    response = Response(stream, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # если клиент ушёл до первого чтения, finally генератора не выполнится
+    response.call_on_close(lambda: subscription.broker.unsubscribe(subscription))
+    return response
+
+
+# -------------------------------
+# ВЫГРУЗКА ЗАЯВОК (CSV / NDJSON)
+# -------------------------------
+@routes_bp.route('/api/applications/export', methods=['GET'])
+def export_applications():
+    """Все заявки на вакансии работодателя одним файлом; фильтры job_id и status."""
+    if 'username' not in session:
+        return jsonify({'error': 'Необходима авторизация'}), 401
 
-    return jsonify(app_list)
+    user = current_user()
+    if not user or user.role != "employer":
+        return jsonify({'error': 'Выгружать заявки может только работодатель'}), 403
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'format должен быть одним из: {", ".join(EXPORT_FORMATS)}'}), 400
+
+    query = application_query(APPLICATION_EXPORT).filter(Job.employer_id == user.id)
+    job_id = request.args.get('job_id')
+    if job_id is not None:
+        # type=int молча превратил бы job_id=abc в None и выгрузил все заявки
+        try:
+            job_id = int(job_id)
+        except ValueError:
+            return jsonify({'error': 'Некорректный параметр job_id'}), 400
+        query = query.filter(Application.job_id == job_id)
+    status = request.args.get('status')
+    if status:
+        query = query.filter(Application.status == status)
+
+    # порядок обхода индексов ix_job_employer_id -> ix_application_job_id_applied_at:
+    # SQLite не строит временное B-дерево для сортировки всей выборки
+    query = query.order_by(Job.id, Application.applied_at)
+    return stream_export(query, APPLICATION_EXPORT, fmt, 'applications')
+
+
+# -------------------------------
+# ДАШБОРД РАБОТОДАТЕЛЯ
+# -------------------------------
+@routes_bp.route('/api/dashboard', methods=['GET'])
+def api_dashboard():
+    """Отклики по статусам на каждую вакансию работодателя — из счётчиков, без обхода откликов"""
+    if 'username' not in session:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    user = current_user()
+    if not user or user.role != "employer":
+        return jsonify({'error': 'Дашборд доступен только работодателю'}), 403
+
+    return json_response(employer_dashboard(user.id))
 
 
 # -------------------------------
 # ОБНОВЛЕНИЕ СТАТУСА ЗАЯВКИ
 # -------------------------------
 @routes_bp.route('/api/applications/<int:app_id>', methods=['PUT'])
+@retry_on_busy
 def update_application(app_id):
     if 'username' not in session:
         return jsonify({'error': 'Необходима авторизация'}), 401
 
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     app = Application.query.get(app_id)
     if not app:
         return jsonify({'error': 'Заявка не найдена'}), 404
@@ -196,20 +537,84 @@ def update_application(app_id):
 
     data = request.get_json()
     new_status = data.get('status')
-    if new_status not in ["submitted", "in_review", "invited", "rejected", "accepted"]:
+    if new_status not in APPLICATION_STATUSES:
         return jsonify({'error': 'Недопустимый статус'}), 400
 
+    record_status_changes([(app.id, new_status)])
     app.status = new_status
     db.session.commit()
+    events.publish(app.student_id, 'application_status', {
+        'id': app.id, 'job_id': app.job_id, 'status': new_status})
     return jsonify({'message': 'Статус обновлён'})
 
+
+@routes_bp.route('/api/applications/bulk', methods=['PUT'])
+@retry_on_busy
+def bulk_update_applications():
+    """Массовая смена статусов: [{"id": ..., "status": ...}, ...].
+
+    Права на все заявки проверяются одним запросом, обновление — один
+    executemany в одной транзакции. Ответ — результат по каждому элементу.
+    """
+    if 'username' not in session:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    user = current_user()
+    if not user or user.role != "employer":
+        return jsonify({'error': 'Изменять статус может только работодатель своей вакансии'}), 403
+
+    items = request.get_json(silent=True)
+    error = check_bulk_items(items)
+    if error:
+        return jsonify({'error': error}), 400
+
+    ids = [item.get('id') for item in items if isinstance(item, dict) and is_id(item.get('id'))]
+    owners = {
+        row.id: row for row in
+        db.session.query(Application.id, Application.job_id, Application.student_id, Job.employer_id)
+        .join(Job, Application.job_id == Job.id)
+        .filter(Application.id.in_(ids))
+    } if ids else {}
+
+    results, updates = [], {}
+    for index, item in enumerate(items):
+        app_id = item.get('id') if isinstance(item, dict) else None
+        if not is_id(app_id):
+            error = 'Поле id обязательно'
+        elif item.get('status') not in APPLICATION_STATUSES:
+            error = 'Недопустимый статус'
+        elif app_id not in owners:
+            error = 'Заявка не найдена'
+        elif owners[app_id].employer_id != user.id:
+            error = 'Изменять статус может только работодатель своей вакансии'
+        else:
+            error = None
+        if error:
+            results.append({'index': index, 'id': app_id, 'error': error})
+            continue
+        # при повторе id побеждает последний элемент
+        updates[app_id] = item['status']
+        results.append({'index': index, 'id': app_id})
+
+    if updates:
+        record_status_changes(updates.items())
+        db.session.execute(update(Application), [
+            {'id': app_id, 'status': status} for app_id, status in updates.items()])
+        db.session.commit()
+        for app_id, status in updates.items():
+            events.publish(owners[app_id].student_id, 'application_status', {
+                'id': app_id, 'job_id': owners[app_id].job_id, 'status': status})
+
+    return jsonify({'updated': len(updates), 'results': results}), 200 if updates else 400
+
 # ПРОФИЛЬ
 @routes_bp.route("/api/profile", methods=["GET", "PUT"])
+@retry_on_busy
 def api_profile():
     if "username" not in session:
         return jsonify({"error": "Необходима авторизация"}), 401
 
-    user = User.query.filter_by(username=session["username"]).first()
+    user = current_user()
 
     if request.method == "GET":
         return jsonify({
@@ -223,6 +628,7 @@ def api_profile():
 
     if request.method == "PUT":
         data = request.get_json()
+        user = db.session.get(User, user.id)
         if user.role == "student":
             user.full_name = data.get("full_name", user.full_name)
             user.course = data.get("course", user.course)
@@ -231,12 +637,14 @@ def api_profile():
             user.organization = data.get("organization", user.organization)
 
         db.session.commit()
+        invalidate_user(user.id)
         return jsonify({"message": "Профиль обновлён"})
 
 
 
 # РЕГИСТРАЦИЯ / ЛОГИН / ЛОГАУТ
 @routes_bp.route('/register', methods=['GET', 'POST'])
+@retry_on_busy
 def register():
     error = None
     if request.method == 'POST':
@@ -247,27 +655,51 @@ def register():
         if not username or not password:
             error = 'Заполните все поля'
         else:
-            existing_user = User.query.filter_by(username=username).first()
-            if existing_user:
-                error = 'Пользователь уже существует'
-            else:
-                hashed_password = generate_password_hash(password)
-                new_user = User(username=username, password=hashed_password, role=role)
-                db.session.add(new_user)
+            try:
+                hashed_password = passwords.hasher.hash(password)
+            except passwords.HasherBusy:
+                return too_many_logins('register.html')
+            # дубль имени отсекает уникальный индекс: один INSERT вместо SELECT + INSERT
+            db.session.add(User(username=username, password=hashed_password, role=role))
+            try:
                 db.session.commit()
                 return redirect(url_for('routes.login'))
+            except IntegrityError:
+                db.session.rollback()
+                error = 'Пользователь уже существует'
 
     return render_template('register.html', error=error)
 
 
+def too_many_logins(template):
+    retry_after = max(1, round(current_app.config['PASSWORD_HASH_WAIT']))
+    return render_template(template, error='Слишком много входов одновременно, повторите через пару секунд'), \
+        429, {'Retry-After': str(retry_after)}
+
+
 @routes_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password, password):
-            session['username'] = username
+        # соединение из пула не должно простаивать, пока считается KDF
+        db.session.close()
+        try:
+            valid = user is not None and passwords.hasher.verify(user.password, password)
+            if valid and passwords.hasher.needs_rehash(user.password):
+                # хэш со старыми параметрами KDF: пароль известен только сейчас
+                rehashed = passwords.hasher.hash(password)
+                User.query.filter_by(id=user.id).update({'password': rehashed})
+                try:
+                    db.session.commit()
+                except OperationalError:
+                    # база занята — не страшно, пересчитаем при следующем входе
+                    db.session.rollback()
+        except passwords.HasherBusy:
+            return too_many_logins('login.html')
+        if valid:
+            login_user(user)
             return redirect(url_for('routes.index'))
         else:
             return render_template('login.html', error='Неверный логин или пароль')
@@ -277,10 +709,16 @@ def login():
 
 @routes_bp.route('/logout')
 def logout():
-    session.pop('username', None)
+    logout_user()
     return redirect(url_for('routes.login'))
 
 
+# Счётчики кэшей: проверить под нагрузкой, что они действительно работают
+@routes_bp.route('/api/stats/cache')
+def cache_stats():
+    return jsonify({'user_cache': user_cache.stats(), 'response_cache': response_cache.stats()})
+
+
 # ГЛАВНАЯ
 @routes_bp.route('/')
 def index():
@@ -290,11 +728,12 @@ def index():
         return redirect(url_for('routes.login'))
 
 @routes_bp.route("/api/jobs/<int:job_id>/rate", methods=["POST"])
+@retry_on_busy
 def rate_job(job_id):
     if "username" not in session:
         return jsonify({"error": "Необходима авторизация"}), 401
 
-    user = User.query.filter_by(username=session["username"]).first()
+    user = current_user()
     if not user or user.role != "student":
         return jsonify({"error": "Оценивать могут только студенты"}), 403
 
@@ -306,29 +745,25 @@ def rate_job(job_id):
     except Exception:
         return jsonify({"error": "Введите оценку от 1 до 5"}), 400
 
-    job = Job.query.get(job_id)
-    if not job:
+    # настоящее среднее и байесовский рейтинг, один UPDATE без чтения вакансии
+    if not record_rating(job_id, rating_value):
         return jsonify({"error": "Вакансия не найдена"}), 404
 
-    # Если уже есть рейтинг, обновляем, иначе ставим новый
-    if job.job_rating:
-        job.job_rating = (job.job_rating + rating_value) / 2
-    else:
-        job.job_rating = rating_value
-
     db.session.commit()
+    response_cache.invalidate('jobs')
     return jsonify({"message": "Оценка сохранена"}), 200
 
 # -------------------------------
 # ОЦЕНКА СТАЖИРОВКИ
 # -------------------------------
 @routes_bp.route("/api/rate/<int:app_id>", methods=["POST"])
+@retry_on_busy
 def rate_application(app_id):
     """Студент ставит оценку своей стажировке"""
     if "username" not in session:
         return jsonify({"error": "Необходима авторизация"}), 401
 
-    user = User.query.filter_by(username=session["username"]).first()
+    user = current_user()
     if not user or user.role != "student":
         return jsonify({"error": "Оценивать могут только студенты"}), 403
 
@@ -346,7 +781,11 @@ def rate_application(app_id):
     except (ValueError, TypeError):
         return jsonify({"error": "Оценка должна быть от 1 до 5"}), 400
 
+    record_rating(app_obj.job_id, rating, old_rating=app_obj.rating)
     app_obj.rating = rating
     db.session.commit()
+    response_cache.invalidate('jobs')
+    events.publish(app_obj.job.employer_id, 'application_rated', {
+        'id': app_obj.id, 'job_id': app_obj.job_id, 'rating': rating})
 
     return jsonify({"message": "Оценка сохранена"}), 200
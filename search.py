@@ -0,0 +1,113 @@
+# search.py
+"""Полнотекстовый поиск по вакансиям на SQLite FTS5.
+
+Индекс job_fts хранит только токены title/description (external content),
+сами строки читаются из таблицы job. Синхронизацию делают триггеры, поэтому
+индекс остаётся актуальным при любом INSERT/UPDATE/DELETE, в том числе при
+массовых вставках мимо ORM.
+"""
+import re
+
+from flask import current_app
+from sqlalchemy import DDL, event, literal_column, select, text
+
+from models import db, Job
+
+FTS_TABLE = "job_fts"
+
+# Заголовок весит больше описания при ранжировании bm25
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_CREATE_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, content='job', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON job BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON job BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON job BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+]
+
+# db.create_all()/drop_all() (create_db.py, тесты) сами создают и удаляют индекс
+for _statement in _CREATE_STATEMENTS:
+    event.listen(Job.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Job.__table__, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(keyword):
+    """Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки (спецсимволы FTS не интерпретируются)
+    и ищется по префиксу: "разраб" найдёт "разработчик".
+    """
+    tokens = _TOKEN_RE.findall(keyword.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def fts_available():
+    return (current_app.config.get("SEARCH_BACKEND", "fts") == "fts"
+            and db.engine.dialect.name == "sqlite")
+
+
+def like_filter(model, keyword):
+    """ILIKE по title/description; для архива (job_archive) FTS-индекса нет."""
+    return model.title.ilike(f"%{keyword}%") | model.description.ilike(f"%{keyword}%")
+
+
+def apply_keyword_filter(query, keyword, sort_keys):
+    """Фильтрует запрос по ключевым словам.
+
+    Возвращает (query, sort_keys). С FTS5 результаты упорядочиваются по
+    релевантности (bm25), иначе — прежний ILIKE по title/description
+    с исходной сортировкой sort_keys.
+    """
+    match = build_match_query(keyword)
+    if not match or not fts_available():
+        return query.filter(like_filter(Job, keyword)), sort_keys
+
+    ranked = (
+        select(
+            literal_column("rowid").label("job_id"),
+            literal_column(f"bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})").label("rank"),
+        )
+        .select_from(text(FTS_TABLE))
+        .where(text(f"{FTS_TABLE} MATCH :fts_match").bindparams(fts_match=match))
+        .subquery("fts")
+    )
+    query = query.join(ranked, ranked.c.job_id == Job.id)
+    return query, [(ranked.c.rank, False), (Job.id, False)]
+
+
+def keyword_criterion(keyword):
+    """Условие "вакансия подходит под keyword" без ранжирования (фасеты, счётчики)."""
+    match = build_match_query(keyword)
+    if not match or not fts_available():
+        return like_filter(Job, keyword)
+    return Job.id.in_(
+        select(literal_column("rowid"))
+        .select_from(text(FTS_TABLE))
+        .where(text(f"{FTS_TABLE} MATCH :fts_match").bindparams(fts_match=match)))
+
+
+def rebuild_search_index():
+    """Создаёт индекс в уже существующей базе и заполняет его из таблицы job."""
+    with db.engine.begin() as conn:
+        for statement in _CREATE_STATEMENTS:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
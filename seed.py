@@ -0,0 +1,192 @@
+# seed.py
+"""Генератор синтетических данных для нагрузочных тестов и бенчмарков.
+
+Строит N пользователей, вакансий и откликов с реалистичной длиной текстов.
+Вставка идёт через executemany на сыром соединении SQLite с отключённым
+журналом; вторичные индексы и триггеры полнотекстового индекса на время
+загрузки снимаются и строятся заново одним проходом в конце.
+
+    python seed.py --users 20000 --jobs 100000 --applications 1000000 --db /tmp/load.db
+
+У всех пользователей пароль "password"; имена — student<N> и employer<N>.
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+SYLLABLES = ["ра", "бо", "та", "ко", "ман", "да", "ана", "лит", "ик", "про",
+             "ект", "сис", "тем", "дан", "ных", "сер", "вер", "веб", "мо", "биль"]
+FACULTIES = ["ФКН", "Экономический", "Физический", "Юридический", "Филологический", "Мехмат"]
+JOB_TYPES = ["internship", "practice", "job"]
+APPLICATION_STATUSES = ["submitted", "in_review", "invited", "rejected", "accepted"]
+PASSWORD = "password"
+CHUNK = 20000
+
+
+def make_vocabulary(size, seed=0):
+    rnd = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_weights(n):
+    # распределение Ципфа: частые и редкие слова, как в живом тексте
+    return [1.0 / (rank + 1) for rank in range(n)]
+
+
+def make_text(rnd, vocabulary, weights, n_words):
+    return " ".join(rnd.choices(vocabulary, weights=weights, k=n_words))
+
+
+class TextPool:
+    """Заранее сгенерированные тексты: генерировать миллион описаний по слову слишком долго."""
+
+    def __init__(self, rnd, vocabulary, min_words, max_words, size=2000):
+        weights = zipf_weights(len(vocabulary))
+        self.rnd = rnd
+        self.texts = [make_text(rnd, vocabulary, weights, rnd.randint(min_words, max_words))
+                      for _ in range(size)]
+
+    def pick(self):
+        return self.rnd.choice(self.texts)
+
+
+def _timestamps(rnd, n, days=730):
+    now = datetime.utcnow()
+    # тот же формат, в котором SQLAlchemy хранит DateTime в SQLite
+    return [(now - timedelta(seconds=rnd.randint(0, days * 86400))).strftime("%Y-%m-%d %H:%M:%S.%f")
+            for _ in range(n)]
+
+
+def _chunks(rows):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+def seed_jobs(db, n_jobs, vocabulary, seed=0, chunk=10000):
+    """Массово вставляет n_jobs открытых вакансий одного работодателя (бенчмарк поиска)."""
+    from sqlalchemy import insert
+    from models import User, Job
+
+    rnd = random.Random(seed)
+    weights = zipf_weights(len(vocabulary))
+    employer = User(username="bench-employer", password="-", role="employer")
+    db.session.add(employer)
+    db.session.commit()
+
+    for start in range(0, n_jobs, chunk):
+        rows = [{
+            "title": make_text(rnd, vocabulary, weights, rnd.randint(2, 5)),
+            "description": make_text(rnd, vocabulary, weights, rnd.randint(40, 120)),
+            "job_type": rnd.choice(JOB_TYPES),
+            "status": "open",
+            "employer_id": employer.id,
+        } for _ in range(min(chunk, n_jobs - start))]
+        db.session.execute(insert(Job), rows)
+        db.session.commit()
+
+
+def seed_database(db, n_users, n_jobs, n_applications, seed=0, employer_share=0.1, closed_share=0.1):
+    """Заполняет пустую базу; возвращает число вставленных строк по таблицам."""
+    from werkzeug.security import generate_password_hash
+    from ratings import recompute_rating_stats
+    from dashboard import recompute_status_counts
+    from search import FTS_TABLE
+
+    rnd = random.Random(seed)
+    vocabulary = make_vocabulary(5000, seed)
+    titles = TextPool(rnd, vocabulary, 3, 8)
+    descriptions = TextPool(rnd, vocabulary, 80, 400)
+    letters = TextPool(rnd, vocabulary, 50, 200)
+    password = generate_password_hash(PASSWORD)
+
+    n_employers = max(1, int(n_users * employer_share))
+    n_students = max(1, n_users - n_employers)
+    users = [(f"employer{i}", password, "employer", None, None, None, f"ООО {make_text(rnd, vocabulary, None, 2)}")
+             for i in range(n_employers)]
+    users += [(f"student{i}", password, "student", make_text(rnd, vocabulary, None, 3),
+               str(rnd.randint(1, 6)), rnd.choice(FACULTIES), None)
+              for i in range(n_students)]
+
+    created_at = _timestamps(rnd, n_jobs)
+    jobs = [(titles.pick()[:150], descriptions.pick(), rnd.choice(JOB_TYPES),
+             "closed" if rnd.random() < closed_share else "open", created_at[i], rnd.randint(1, n_employers))
+            for i in range(n_jobs)]
+
+    # уникальные пары студент-вакансия (уникальный индекс uq_application_student_job)
+    n_applications = min(n_applications, n_students * n_jobs)
+    pairs = set()
+    while len(pairs) < n_applications:
+        pairs.add((rnd.randint(n_employers + 1, n_employers + n_students), rnd.randint(1, n_jobs)))
+    applied_at = _timestamps(rnd, n_applications, days=365)
+    applications = [(f"https://cv.example/{student_id}", letters.pick(), rnd.choice(APPLICATION_STATUSES),
+                     applied_at[i], student_id, job_id, rnd.randint(1, 5) if rnd.random() < 0.2 else None)
+                    for i, (student_id, job_id) in enumerate(pairs)]
+
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # пустая база, которую при сбое не жалко — журнал не нужен
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")
+        # индекс, построенный сортировкой после загрузки, быстрее поддержки на каждой вставке
+        deferred = cursor.execute("SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                                  "AND tbl_name IN ('job', 'application') AND sql IS NOT NULL").fetchall()
+        for kind, name, _ in deferred:
+            cursor.execute(f"DROP {kind.upper()} {name}")
+        for chunk in _chunks(users):
+            cursor.executemany("INSERT INTO user (username, password, role, full_name, course, faculty, "
+                               "organization) VALUES (?, ?, ?, ?, ?, ?, ?)", chunk)
+        for chunk in _chunks(jobs):
+            cursor.executemany("INSERT INTO job (title, description, job_type, status, created_at, "
+                               "employer_id) VALUES (?, ?, ?, ?, ?, ?)", chunk)
+        for chunk in _chunks(applications):
+            cursor.executemany("INSERT INTO application (resume_url, cover_letter, status, applied_at, "
+                               "student_id, job_id, rating) VALUES (?, ?, ?, ?, ?, ?, ?)", chunk)
+        for _, _, sql in deferred:
+            cursor.execute(sql)
+        if any(name.startswith(FTS_TABLE) for _, name, _ in deferred):
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        raw.commit()
+        cursor.execute("PRAGMA journal_mode=DELETE")
+        cursor.close()
+    finally:
+        raw.close()
+
+    recompute_rating_stats()
+    recompute_status_counts()
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+    return {"users": len(users), "jobs": len(jobs), "applications": len(applications)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--applications", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", required=True, help="путь к файлу SQLite (будет пересоздан)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.abspath(args.db)
+    from app import app
+    from models import db
+
+    started = datetime.now()
+    with app.app_context():
+        db.create_all()
+        counts = seed_database(db, args.users, args.jobs, args.applications, args.seed)
+    elapsed = (datetime.now() - started).total_seconds()
+    print(", ".join(f"{table}: {count}" for table, count in counts.items()) + f" — {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# serializers.py
+"""Сериализация ответов API.
+
+Projection — список (ключ JSON, столбец SQL[, преобразование]). По нему
+строится и SELECT (projection.columns), и заранее скомпилированная функция
+row -> dict, которая читает кортеж строки по индексам: без ORM-объектов,
+без getattr и без проверок на каждую строку.
+
+JSON кодируется orjson, если он установлен, иначе стандартным json.
+"""
+import json
+
+from flask import Response
+from sqlalchemy import Boolean, case, literal
+from sqlalchemy.orm import aliased
+
+from models import User, Job, Application, ArchivedJob, ArchivedApplication
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+Student = aliased(User, name="student_user")
+Employer = aliased(User, name="employer_user")
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class Projection:
+    def __init__(self, *fields):
+        self.fields = fields
+        self.keys = tuple(field[0] for field in fields)
+        self.columns = tuple(field[1] for field in fields)
+        self.to_dict = self._compile()
+
+    def extend(self, *fields):
+        return Projection(*self.fields, *fields)
+
+    def _compile(self):
+        # генерируем "lambda row: {'id': row[0], 'created_at': _c5(row[5]), ...}"
+        namespace, items = {}, []
+        for i, field in enumerate(self.fields):
+            value = f"row[{i}]"
+            if len(field) > 2:
+                namespace[f"_c{i}"] = field[2]
+                value = f"_c{i}({value})"
+            items.append(f"{field[0]!r}: {value}")
+        return eval(f"lambda row: {{{', '.join(items)}}}", namespace)
+
+    def serialize(self, rows):
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+
+def job_projection(model):
+    return Projection(
+        ("id", model.id),
+        ("title", model.title),
+        ("description", model.description),
+        ("job_type", model.job_type),
+        ("status", model.status),
+        ("created_at", model.created_at, isoformat),
+        ("rating", model.job_rating),
+        ("rating_count", model.rating_count),
+        ("employer", Employer.username),
+    )
+
+
+JOB = job_projection(Job)
+ARCHIVED_JOB = job_projection(ArchivedJob)
+
+TOP_JOB = JOB.extend(("score", Job.rating_score))
+
+
+def application_projection(can_manage, model=Application, job_title=Job.title):
+    # для отклика без студента/работодателя — "" (как было в ручной сборке словаря)
+    def if_joined(alias, column):
+        return case((alias.id.isnot(None), column), else_="")
+
+    return Projection(
+        ("id", model.id),
+        ("job_id", model.job_id),
+        ("job_title", job_title),
+        #  студент
+        ("student", Student.username),
+        ("student_full_name", if_joined(Student, Student.full_name)),
+        ("student_course", if_joined(Student, Student.course)),
+        ("student_faculty", if_joined(Student, Student.faculty)),
+        #  работодатель (берём у вакансии -> employer -> organization)
+        ("organization", if_joined(Employer, Employer.organization)),
+        ("resume_url", model.resume_url),
+        ("cover_letter", model.cover_letter),
+        ("status", model.status),
+        ("applied_at", model.applied_at, isoformat),
+        ("can_manage", literal(can_manage, Boolean)),
+    )
+
+
+APPLICATION_FOR_EMPLOYER = application_projection(True)
+APPLICATION_FOR_STUDENT = application_projection(False)
+# архивные отклики только для чтения: менять статус уже нельзя
+ARCHIVED_APPLICATION = application_projection(False, ArchivedApplication, ArchivedApplication.job_title)
+
+# выгрузка для работодателя (export.py): плоские столбцы без служебных флагов
+APPLICATION_EXPORT = Projection(
+    ("id", Application.id),
+    ("job_id", Application.job_id),
+    ("job_title", Job.title),
+    ("organization", Employer.organization),
+    ("student", Student.username),
+    ("student_full_name", Student.full_name),
+    ("student_course", Student.course),
+    ("student_faculty", Student.faculty),
+    ("resume_url", Application.resume_url),
+    ("cover_letter", Application.cover_letter),
+    ("status", Application.status),
+    ("rating", Application.rating),
+    ("applied_at", Application.applied_at, isoformat),
+)
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+dumps = orjson.dumps if orjson is not None else stdlib_dumps
+
+
+def json_response(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype="application/json")
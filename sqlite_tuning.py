@@ -0,0 +1,90 @@
+# sqlite_tuning.py
+"""Профиль SQLite для нескольких воркеров gunicorn (включается SQLITE_TUNED=1).
+
+- WAL: читатели не блокируют писателя и наоборот;
+- synchronous=NORMAL: в WAL безопасно и без fsync на каждый commit;
+- mmap_size / cache_size: горячие страницы читаются без системных вызовов;
+- busy_timeout: писатель ждёт освобождения блокировки вместо ошибки.
+
+Если блокировка так и не освободилась (или случился deadlock при повышении
+SHARED -> RESERVED, когда busy_timeout не срабатывает), retry_on_busy
+откатывает транзакцию и повторяет обработчик с ограниченной экспоненциальной
+задержкой.
+"""
+import functools
+import random
+import time
+
+from flask import current_app, jsonify
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from models import db
+
+_BUSY_MESSAGES = ("database is locked", "database is busy", "database table is locked")
+
+
+def init_sqlite_tuning(app):
+    """Вызывается до db.init_app(): параметры пула задаются при создании движка."""
+    if not app.config["SQLITE_TUNED"] or not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    options.setdefault("connect_args", {}).update({
+        # таймаут pysqlite — тот же busy_timeout, но и для BEGIN
+        "timeout": app.config["SQLITE_BUSY_TIMEOUT_MS"] / 1000,
+        "check_same_thread": False,
+    })
+    # соединение на поток воркера; SQLite всё равно пропускает одного писателя
+    options.setdefault("pool_size", 8)
+    options.setdefault("max_overflow", 8)
+    options.setdefault("pool_timeout", 30)
+
+
+def register_sqlite_pragmas(app):
+    """Вызывается после db.init_app(): вешает PRAGMA на каждое новое соединение."""
+    if not app.config["SQLITE_TUNED"] or not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    config = app.config.copy()
+    with app.app_context():
+        event.listen(db.engine, "connect",
+                     lambda dbapi_conn, record: apply_sqlite_pragmas(dbapi_conn, config))
+
+
+def apply_sqlite_pragmas(dbapi_conn, config):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+    # отрицательное значение — размер в КиБ, а не в страницах
+    cursor.execute(f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KIB'])}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def is_busy_error(exc):
+    return any(message in str(exc.orig) for message in _BUSY_MESSAGES)
+
+
+def retry_on_busy(view):
+    """Повторяет обработчик целиком при SQLITE_BUSY.
+
+    Побочные эффекты обработчиков (инвалидация кэшей, события) выполняются
+    только после успешного commit, поэтому повтор безопасен.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        attempts = current_app.config["WRITE_RETRY_ATTEMPTS"]
+        delay = current_app.config["WRITE_RETRY_BASE_DELAY"]
+        for attempt in range(attempts + 1):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_busy_error(e) or attempt == attempts:
+                    if is_busy_error(e):
+                        return jsonify({"error": "База данных занята, повторите запрос"}), 503
+                    raise
+                # экспоненциальная задержка с джиттером, чтобы воркеры не просыпались разом
+                time.sleep(delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+    return wrapper
@@ -1,13 +1,17 @@
 # test_app.py
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 from app import app, db
-from models import Job
+from models import Job, Application
+from response_cache import response_cache
 
 @pytest.fixture(autouse=True)
 def setup_db():
     with app.app_context():
         db.drop_all()
         db.create_all()
+        response_cache.clear()
         yield
         db.session.remove()
         db.drop_all()
@@ -76,3 +80,736 @@ def test_update_profile():
     client.post("/login", data={"username": "student5", "password": "123"})
     resp = client.put("/api/profile", json={"full_name": "Иванов Иван", "course": "2", "faculty": "ФКН"})
     assert resp.status_code == 200
+
+def login_as(client, username, role):
+    client.post("/register", data={"username": username, "password": "123", "role": role})
+    client.post("/login", data={"username": username, "password": "123"})
+
+def test_search_jobs_ranked_prefix():
+    client = app.test_client()
+    login_as(client, "employer5", "employer")
+    client.post("/api/jobs", json={"title": "Стажёр-аналитик", "description": "Работа с данными и отчётами"})
+    client.post("/api/jobs", json={"title": "Python разработчик", "description": "Бэкенд на Flask"})
+    client.post("/api/jobs", json={"title": "Тестировщик", "description": "Поможете python разработчикам с тестами"})
+
+    resp = client.get("/api/jobs?q=разраб")
+    titles = [job["title"] for job in resp.get_json()]
+    # совпадение в заголовке ранжируется выше совпадения в описании
+    assert titles == ["Python разработчик", "Тестировщик"]
+
+def test_rebuild_search_index_command():
+    client = app.test_client()
+    login_as(client, "employer6r", "employer")
+    client.post("/api/jobs", json={"title": "Верстальщик", "description": "HTML"})
+    # база до появления поиска: ни индекса, ни триггеров
+    with db.engine.begin() as conn:
+        for suffix in ("ai", "ad", "au"):
+            conn.exec_driver_sql(f"DROP TRIGGER job_fts_{suffix}")
+        conn.exec_driver_sql("DROP TABLE job_fts")
+    client.post("/api/jobs", json={"title": "Верстальщик email", "description": "CSS"})
+
+    result = app.test_cli_runner().invoke(args=["rebuild-search-index"])
+    assert result.exit_code == 0 and "перестроен" in result.output
+    assert len(client.get("/api/jobs?q=верстал").get_json()) == 2
+    # триггеры снова на месте
+    client.post("/api/jobs", json={"title": "Верстальщик junior", "description": "CSS"})
+    assert len(client.get("/api/jobs?q=верстал").get_json()) == 3
+
+def test_search_index_synced_on_update_and_delete():
+    client = app.test_client()
+    login_as(client, "employer6", "employer")
+    job_id = client.post("/api/jobs", json={"title": "Дизайнер", "description": "Макеты"}).get_json()["id"]
+
+    client.put(f"/api/jobs/{job_id}", json={"title": "Иллюстратор"})
+    assert client.get("/api/jobs?q=дизайнер").get_json() == []
+    assert len(client.get("/api/jobs?q=иллюстр").get_json()) == 1
+
+    client.delete(f"/api/jobs/{job_id}")
+    assert client.get("/api/jobs?q=иллюстр").get_json() == []
+
+def test_jobs_keyset_pagination_and_stream():
+    client = app.test_client()
+    login_as(client, "employer7", "employer")
+    for i in range(5):
+        client.post("/api/jobs", json={"title": f"Job {i}", "description": "Some desc"})
+
+    titles, cursor = [], None
+    while True:
+        url = "/api/jobs?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).get_json()
+        titles += [job["title"] for job in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert titles == [f"Job {i}" for i in reversed(range(5))]
+
+    streamed = client.get("/api/jobs?stream=1").get_json()
+    assert [job["title"] for job in streamed] == titles
+    assert client.get("/api/jobs?cursor=garbage").status_code == 400
+
+def test_malformed_cursor_is_400():
+    import base64, json
+    from datetime import datetime
+    from pagination import encode_cursor
+    client = app.test_client()
+    login_as(client, "employer7c", "employer")
+    for i in range(3):
+        client.post("/api/jobs", json={"title": f"Python {i}", "description": "d"})
+
+    shapes = [{}, [1], [[1], [2]], [None, None], ["x", 1], [{"dt": "2026-01-01T00:00:00"}, True]]
+    for payload in shapes:
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        for path in ("/api/jobs", "/api/applications", "/api/jobs?q=python"):
+            sep = "&" if "?" in path else "?"
+            assert client.get(f"{path}{sep}cursor={cursor}").status_code == 400, (path, payload)
+
+    # настоящие курсоры по-прежнему работают, в том числе с рангом FTS
+    page = client.get("/api/jobs?q=python&limit=2").get_json()
+    assert len(page["items"]) == 2
+    assert len(client.get(f"/api/jobs?q=python&limit=2&cursor={page['next_cursor']}").get_json()["items"]) == 1
+    assert client.get(f"/api/applications?cursor={encode_cursor([datetime(2026, 1, 1), 10])}").status_code == 200
+
+@contextmanager
+def count_queries():
+    statements = []
+    def on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+def test_applications_query_count_is_constant():
+    employer = app.test_client()
+    login_as(employer, "employer8", "employer")
+    job_ids = [employer.post("/api/jobs", json={"title": f"Job {i}", "description": "d"}).get_json()["id"]
+               for i in range(3)]
+
+    counts, total = [], 0
+    for n_students in (1, 6):
+        total += n_students
+        for i in range(n_students):
+            student = app.test_client()
+            login_as(student, f"student-{n_students}-{i}", "student")
+            for job_id in job_ids:
+                student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "link"})
+        with count_queries() as statements:
+            resp = employer.get("/api/applications")
+        assert len(resp.get_json()) == total * len(job_ids)
+        counts.append(len(statements))
+
+    # пользователь берётся из кэша, остаётся один запрос со всеми JOIN
+    assert counts == [1, 1]
+
+def test_user_cache_hits_and_profile_invalidation():
+    client = app.test_client()
+    login_as(client, "student9", "student")
+    before = client.get("/api/stats/cache").get_json()["user_cache"]
+
+    with count_queries() as statements:
+        assert client.get("/api/profile").get_json()["full_name"] is None
+    assert statements == []
+
+    client.put("/api/profile", json={"full_name": "Петров Пётр"})
+    assert client.get("/api/profile").get_json()["full_name"] == "Петров Пётр"
+
+    after = client.get("/api/stats/cache").get_json()["user_cache"]
+    assert after["hits"] > before["hits"]
+    assert after["misses"] == before["misses"] + 1
+
+def test_jobs_etag_and_invalidation():
+    client = app.test_client()
+    login_as(client, "employer9", "employer")
+    job_id = client.post("/api/jobs", json={"title": "Job", "description": "d"}).get_json()["id"]
+
+    first = client.get("/api/jobs")
+    etag = first.headers["ETag"]
+    with count_queries() as statements:
+        cached = client.get("/api/jobs", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert statements == []
+
+    client.put(f"/api/jobs/{job_id}", json={"title": "Renamed"})
+    fresh = client.get("/api/jobs", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.get_json()[0]["title"] == "Renamed"
+    assert client.get(f"/api/jobs/{job_id}").get_json()["title"] == "Renamed"
+
+def test_duplicate_apply_rejected():
+    employer = app.test_client()
+    login_as(employer, "employer10", "employer")
+    job_id = employer.post("/api/jobs", json={"title": "Job", "description": "d"}).get_json()["id"]
+
+    student = app.test_client()
+    login_as(student, "student10", "student")
+    assert student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "link"}).status_code == 201
+    assert student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "link"}).status_code == 409
+
+def test_rating_aggregates_and_top_jobs():
+    employer = app.test_client()
+    login_as(employer, "employer11", "employer")
+    first = employer.post("/api/jobs", json={"title": "First", "description": "d"}).get_json()["id"]
+    second = employer.post("/api/jobs", json={"title": "Second", "description": "d"}).get_json()["id"]
+    employer.post("/api/jobs", json={"title": "Unrated", "description": "d"})
+
+    student = app.test_client()
+    login_as(student, "student11", "student")
+    for rating in (5, 4, 3):
+        student.post(f"/api/jobs/{first}/rate", json={"rating": rating})
+    app_id = student.post(f"/api/jobs/{second}/apply", json={"resume_url": "r"}).get_json()["application_id"]
+    student.post(f"/api/rate/{app_id}", json={"rating": 1})
+    student.post(f"/api/rate/{app_id}", json={"rating": 2})  # повторная оценка заменяет прежнюю
+
+    job = student.get(f"/api/jobs/{first}").get_json()
+    assert (job["rating"], job["rating_count"]) == (4.0, 3)
+    job = student.get(f"/api/jobs/{second}").get_json()
+    assert (job["rating"], job["rating_count"]) == (2.0, 1)
+
+    top = student.get("/api/jobs/top").get_json()
+    assert [job["title"] for job in top] == ["First", "Second"]
+    assert top[0]["score"] == pytest.approx((5 * 3.0 + 12) / (5 + 3))
+    assert student.post("/api/jobs/999/rate", json={"rating": 5}).status_code == 404
+
+def test_bulk_create_jobs_and_update_applications():
+    employer = app.test_client()
+    login_as(employer, "employer12", "employer")
+    resp = employer.post("/api/jobs/bulk", json=[
+        {"title": "Bulk 1", "description": "d"},
+        {"title": "", "description": "d"},
+        {"title": "Bulk 2", "description": "d", "job_type": "practice"},
+    ])
+    assert resp.status_code == 201
+    results = resp.get_json()["results"]
+    assert "error" in results[1]
+    job_ids = [results[0]["id"], results[2]["id"]]
+    assert employer.get(f"/api/jobs/{job_ids[1]}").get_json()["job_type"] == "practice"
+
+    student = app.test_client()
+    login_as(student, "student12", "student")
+    app_ids = [student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).get_json()["application_id"]
+               for job_id in job_ids]
+
+    other = app.test_client()
+    login_as(other, "employer13", "employer")
+    resp = other.put("/api/applications/bulk", json=[{"id": app_ids[0], "status": "invited"}])
+    assert resp.status_code == 400
+
+    resp = employer.put("/api/applications/bulk", json=[
+        {"id": app_ids[0], "status": "invited"},
+        {"id": app_ids[1], "status": "bogus"},
+        {"id": 999, "status": "rejected"},
+    ])
+    assert resp.get_json()["updated"] == 1
+    statuses = {a["id"]: a["status"] for a in student.get("/api/applications").get_json()}
+    assert statuses == {app_ids[0]: "invited", app_ids[1]: "submitted"}
+
+    # true == 1 в Python, но это не id заявки
+    assert app_ids[0] == 1
+    resp = employer.put("/api/applications/bulk", json=[{"id": True, "status": "rejected"}])
+    assert resp.status_code == 400 and resp.get_json()["results"][0]["error"] == "Поле id обязательно"
+    statuses = {a["id"]: a["status"] for a in student.get("/api/applications").get_json()}
+    assert statuses[app_ids[0]] == "invited"
+
+def test_sqlite_pragmas_and_busy_retry(tmp_path):
+    import sqlite3
+    from sqlalchemy.exc import OperationalError
+    from sqlite_tuning import apply_sqlite_pragmas, retry_on_busy
+
+    conn = sqlite3.connect(str(tmp_path / "tuned.db"))
+    apply_sqlite_pragmas(conn, app.config)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    calls = []
+
+    @retry_on_busy
+    def flaky_write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+        return "ok"
+
+    with app.test_request_context():
+        assert flaky_write() == "ok"
+    assert len(calls) == 3
+
+def test_seed_database_small():
+    from seed import PASSWORD, seed_database
+    from models import Application, User
+    with app.app_context():
+        counts = seed_database(db, n_users=20, n_jobs=30, n_applications=50)
+        assert counts == {"users": 20, "jobs": 30, "applications": 50}
+        assert Application.query.count() == 50
+        rated = Application.query.filter(Application.rating.isnot(None)).count()
+        assert db.session.query(db.func.sum(Job.rating_count)).scalar() == rated
+        student = User.query.filter_by(role="student").first().username
+        keyword = Job.query.filter_by(status="open").first().title.split()[0]
+
+    client = app.test_client()
+    client.post("/login", data={"username": student, "password": PASSWORD})
+    assert client.get("/api/profile").get_json()["username"] == student
+    assert any(keyword in job["title"] for job in client.get(f"/api/jobs?q={keyword}").get_json())
+
+def test_metrics_endpoint():
+    client = app.test_client()
+    login_as(client, "student13", "student")
+
+    def sample(text, series):
+        for line in text.splitlines():
+            if line.startswith(series + " "):
+                return float(line.split()[-1])
+        return 0.0
+
+    requests = 'http_request_duration_seconds_count{method="GET",route="/api/applications"}'
+    statements = 'http_request_sql_statements_sum{method="GET",route="/api/applications"}'
+    before = client.get("/metrics").get_data(as_text=True)
+    client.get("/api/applications")
+    client.get("/api/applications")
+    after = client.get("/metrics").get_data(as_text=True)
+
+    assert sample(after, requests) - sample(before, requests) == 2
+    # пользователь из кэша + один запрос со всеми JOIN
+    assert sample(after, statements) - sample(before, statements) == 2
+    assert 'cache_hits{cache="user"}' in after
+
+def test_serializers_projection_and_json_fallback():
+    import json
+    import serializers
+    client = app.test_client()
+    login_as(client, "employer12", "employer")
+    job_id = client.post("/api/jobs", json={"title": "Аналитик", "description": "SQL"}).get_json()["id"]
+    client.get("/logout")
+    login_as(client, "student12", "student")
+    client.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "link"})
+
+    job = client.get(f"/api/jobs/{job_id}").get_json()
+    assert list(job) == list(serializers.JOB.keys)
+    assert job["employer"] == "employer12" and job["title"] == "Аналитик"
+    application = client.get("/api/applications").get_json()[0]
+    assert application["student"] == "student12" and application["can_manage"] is False
+
+    # без orjson ответ тот же, только через стандартный json
+    row = db.session.query(*serializers.JOB.columns).outerjoin(
+        serializers.Employer, Job.employer_id == serializers.Employer.id).one()
+    assert json.loads(serializers.stdlib_dumps(serializers.JOB.to_dict(row))) == job
+
+def test_export_applications_csv_ndjson_gzip():
+    import csv, gzip, io, json
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer13", "employer")
+    job_id = employer.post("/api/jobs", json={"title": "Аналитик", "description": "SQL"}).get_json()["id"]
+    login_as(student, "student13", "student")
+    student.put("/api/profile", json={"full_name": "Петров Пётр", "course": "3", "faculty": "ФКН"})
+    student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "link", "cover_letter": "Добрый день, коллеги"})
+
+    assert student.get("/api/applications/export").status_code == 403
+    assert employer.get("/api/applications/export?format=xml").status_code == 400
+    assert employer.get("/api/applications/export?job_id=abc").status_code == 400
+
+    resp = employer.get("/api/applications/export?format=csv")
+    assert resp.headers["Content-Disposition"] == 'attachment; filename="applications.csv"'
+    rows = list(csv.DictReader(io.StringIO(resp.data.decode("utf-8-sig"))))
+    assert len(rows) == 1
+    assert rows[0]["student_full_name"] == "Петров Пётр" and rows[0]["job_title"] == "Аналитик"
+
+    resp = employer.get(f"/api/applications/export?format=ndjson&job_id={job_id}",
+                        headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(resp.data).decode().splitlines()
+    assert [json.loads(line)["student_faculty"] for line in lines] == ["ФКН"]
+
+def test_export_csv_escapes_formulas():
+    import csv, io, json
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer13f", "employer")
+    job_id = employer.post("/api/jobs", json={"title": "Бухгалтер", "description": "1С"}).get_json()["id"]
+    login_as(student, "student13f", "student")
+    student.put("/api/profile", json={"full_name": "=HYPERLINK(\"http://evil\")", "course": "2", "faculty": "@SUM(A1)"})
+    student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "link", "cover_letter": "-2+3"})
+
+    resp = employer.get(f"/api/applications/export?format=csv&job_id={job_id}")
+    row = next(csv.DictReader(io.StringIO(resp.data.decode("utf-8-sig"))))
+    assert row["student_full_name"] == "'=HYPERLINK(\"http://evil\")"
+    assert row["student_faculty"] == "'@SUM(A1)" and row["cover_letter"] == "'-2+3"
+    assert row["job_title"] == "Бухгалтер"
+
+    # NDJSON не трогаем: там формул нет
+    resp = employer.get(f"/api/applications/export?format=ndjson&job_id={job_id}")
+    assert json.loads(resp.data)["cover_letter"] == "-2+3"
+
+def test_archive_command_and_include_archived():
+    from datetime import datetime, timedelta
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer14", "employer")
+    old_id = employer.post("/api/jobs", json={"title": "Летняя практика", "description": "2024"}).get_json()["id"]
+    hot_id = employer.post("/api/jobs", json={"title": "Стажировка", "description": "2026"}).get_json()["id"]
+    login_as(student, "student14", "student")
+    old_app = student.post(f"/api/jobs/{old_id}/apply", json={"resume_url": "a"}).get_json()["application_id"]
+    done_app = student.post(f"/api/jobs/{hot_id}/apply", json={"resume_url": "b"}).get_json()["application_id"]
+
+    assert employer.put(f"/api/jobs/{old_id}", json={"status": "closed"}).status_code == 200
+    employer.put(f"/api/applications/{done_app}", json={"status": "rejected"})
+    long_ago = datetime.utcnow() - timedelta(days=800)
+    db.session.execute(db.update(Job).where(Job.id == old_id).values(created_at=long_ago))
+    db.session.execute(db.text("UPDATE application SET applied_at = :t"), {"t": long_ago})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["archive", "--batch-size", "1"])
+    assert "вакансий 1 (с откликами: 1), завершённых откликов 1" in result.output
+    assert db.session.scalar(db.select(db.func.count(Application.id))) == 0
+
+    assert employer.get("/api/jobs?status=closed").get_json() == []
+    archived = employer.get("/api/jobs?status=closed&include_archived=1").get_json()
+    assert [job["id"] for job in archived] == [old_id]
+    assert employer.get(f"/api/jobs/{old_id}").status_code == 404
+    assert employer.get(f"/api/jobs/{old_id}?include_archived=1").get_json()["title"] == "Летняя практика"
+    assert student.get("/api/jobs?q=летняя&status=closed").get_json() == []
+
+    assert student.get("/api/applications").get_json() == []
+    ids, cursor = [], ""
+    while cursor is not None:
+        page = student.get(f"/api/applications?include_archived=1&limit=1&cursor={cursor}").get_json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert sorted(ids) == sorted([old_app, done_app])
+    by_employer = employer.get("/api/applications?include_archived=1").get_json()
+    assert {item["job_title"] for item in by_employer} == {"Летняя практика", "Стажировка"}
+
+    # прочие роли видят все отклики; с include_archived — и все архивные
+    other = app.test_client()
+    login_as(other, "admin14", "admin")
+    live = {item["id"] for item in other.get("/api/applications").get_json()}
+    everything = {item["id"] for item in other.get("/api/applications?include_archived=1").get_json()}
+    assert live < everything and {old_app, done_app} <= everything
+
+def test_events_stream_pushes_status_and_overflow_resync(tmp_path):
+    import events
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer15", "employer")
+    job_id = employer.post("/api/jobs", json={"title": "Тестировщик", "description": "QA"}).get_json()["id"]
+    login_as(student, "student15", "student")
+
+    app.config["EVENTS_HEARTBEAT"] = 0.05
+    try:
+        stream = student.get("/api/events", buffered=False)
+        employer_stream = employer.get("/api/events", buffered=False)
+        chunks, employer_chunks = iter(stream.response), iter(employer_stream.response)
+        assert next(chunks).startswith(b"retry:")
+        assert next(employer_chunks).startswith(b"retry:")
+
+        app_id = student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).get_json()["application_id"]
+        assert b"event: application_created" in next(employer_chunks)
+        employer.put(f"/api/applications/{app_id}", json={"status": "invited"})
+        event = next(chunks).decode()
+        assert "event: application_status" in event and '"status": "invited"' in event
+        assert next(chunks) == b": heartbeat\n\n"
+        stream.close()
+        employer_stream.close()
+        assert events.broker.subscriber_count() == 0
+    finally:
+        app.config["EVENTS_HEARTBEAT"] = 15
+
+    # медленный подписчик: очередь ограничена, вместо накопления — resync и отключение
+    broker = events.LocalBroker(queue_size=2)
+    subscription = broker.subscribe("user:1")
+    for i in range(5):
+        broker.publish("user:1", "application_status", {"id": i})
+    assert subscription.queue.qsize() == 2
+    messages = list(events.event_stream(subscription, heartbeat=0.01))
+    assert messages[-1].startswith("id: 0\nevent: resync")
+    assert broker.subscriber_count() == 0
+
+    # два "воркера" на общем файле: публикация в одном доходит до подписчика другого
+    path = str(tmp_path / "events.db")
+    publisher, worker = events.SQLiteBroker(path, poll_interval=0.01), events.SQLiteBroker(path, poll_interval=0.01)
+    # поток опроса стартует при первой подписке (в воркере после fork), а не в конструкторе
+    assert worker._poller is None
+    subscription = worker.subscribe("user:7")
+    assert worker._poller.is_alive() and publisher._poller is None
+    publisher.publish("user:7", "application_rated", {"rating": 5})
+    assert subscription.get(timeout=2)[1:] == ("application_rated", {"rating": 5})
+    publisher.close()
+    worker.close()
+
+def test_recommended_jobs_incremental_index():
+    pytest.importorskip("scipy")
+    import recommend
+    recommend.init_recommendations(app)
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer16", "employer")
+    applied = employer.post("/api/jobs", json={"title": "Python backend", "description": "Flask и SQL"}).get_json()["id"]
+    analyst = employer.post("/api/jobs", json={"title": "Аналитик данных", "description": "Python, pandas, SQL"}).get_json()["id"]
+    employer.post("/api/jobs", json={"title": "Бухгалтер", "description": "Первичная документация"})
+    login_as(student, "student16", "student")
+    student.post(f"/api/jobs/{applied}/apply", json={"resume_url": "r"})
+
+    feed = student.get("/api/jobs/recommended").get_json()
+    # отклик уже есть — в ленту не попадает; бухгалтер без общих слов — тоже
+    assert [job["id"] for job in feed] == [analyst]
+
+    # индекс уже построен: новая и закрытая вакансии учитываются инкрементально
+    django = employer.post("/api/jobs", json={"title": "Python backend Django", "description": "SQL"}).get_json()["id"]
+    employer.put(f"/api/jobs/{analyst}", json={"status": "closed"})
+    feed = student.get("/api/jobs/recommended").get_json()
+    assert [job["id"] for job in feed] == [django]
+    assert recommend.index.stats()["jobs"] == 3
+    assert employer.get("/api/jobs/recommended").status_code == 403
+
+def test_recommended_jobs_rejects_non_positive_limit():
+    student = app.test_client()
+    login_as(student, "student16l", "student")
+    # проверка limit идёт раньше проверки numpy/scipy
+    for limit in ("0", "-1", "abc"):
+        assert student.get(f"/api/jobs/recommended?limit={limit}").status_code == 400
+
+def test_group_commit_apply_burst():
+    import threading
+    import group_commit
+    employer = app.test_client()
+    login_as(employer, "employer17", "employer")
+    job_id = employer.post("/api/jobs", json={"title": "Популярная", "description": "Все хотят"}).get_json()["id"]
+    students = []
+    for i in range(12):
+        client = app.test_client()
+        login_as(client, f"student17-{i}", "student")
+        students.append(client)
+
+    app.config.update(GROUP_COMMIT=True, GROUP_COMMIT_MAX_DELAY_MS=50)
+    group_commit.init_group_commit(app)
+    try:
+        barrier, statuses = threading.Barrier(len(students)), []
+
+        def burst(client):
+            barrier.wait()
+            statuses.append(client.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).status_code)
+
+        threads = [threading.Thread(target=burst, args=(client,)) for client in students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert statuses == [201] * len(students)
+        stats = group_commit.writer.stats()
+        # все отклики записаны, но транзакций меньше, чем запросов
+        assert stats["rows"] == len(students) and stats["batches"] < len(students)
+
+        assert students[0].post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).status_code == 409
+        assert db.session.scalar(db.select(db.func.count(Application.id))) == len(students)
+        db.session.expire_all()
+        assert db.session.get(Job, job_id).applications_submitted == len(students)
+    finally:
+        app.config.update(GROUP_COMMIT=False, GROUP_COMMIT_MAX_DELAY_MS=5)
+        group_commit.init_group_commit(app)
+
+def test_group_commit_timeout_never_writes_after_503():
+    import threading
+    import group_commit
+    started, release, written = threading.Event(), threading.Event(), []
+
+    def slow_handler(conn, payloads):
+        started.set()
+        release.wait(5)
+        written.extend(payloads)
+        return payloads
+
+    previous = group_commit.writer
+    group_commit.writer = group_commit.GroupCommitWriter(db.engine, slow_handler, max_batch=1, max_delay=0)
+    try:
+        results = []
+        first = threading.Thread(target=lambda: results.append(group_commit.submit_application("a", 0.05)))
+        first.start()
+        assert started.wait(5)
+        # "a" уже пишется, "b" ждёт в очереди: отмена снимает его, 503 честный
+        with pytest.raises(group_commit.WriterBusy):
+            group_commit.submit_application("b", 0.05)
+        release.set()
+        first.join()
+        # таймаут "a" пришёлся на запись пачки: запрос дождался её исхода
+        assert results == ["a"]
+        group_commit.writer.stop()
+        assert written == ["a"]
+    finally:
+        release.set()
+        group_commit.writer.stop()
+        group_commit.writer = previous
+
+def test_password_rehash_on_login_and_busy_hasher():
+    import passwords
+    from models import User
+    client = app.test_client()
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    passwords.init_passwords(app)
+    try:
+        client.post("/register", data={"username": "student18", "password": "123", "role": "student"})
+        resp = client.post("/register", data={"username": "student18", "password": "456", "role": "student"})
+        assert resp.status_code != 302  # дубль имени — без второй строки
+        assert User.query.filter_by(username="student18").count() == 1
+        assert User.query.filter_by(username="student18").one().password.startswith("pbkdf2:sha256:1000$")
+
+        app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+        passwords.init_passwords(app)
+        assert client.post("/login", data={"username": "student18", "password": "123"}).status_code == 302
+        db.session.expire_all()
+        assert User.query.filter_by(username="student18").one().password.startswith("pbkdf2:sha256:2000$")
+
+        # все места пула заняты: хэширование не ждёт бесконечно (обработчик отвечает 429)
+        app.config.update(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_WAIT=0.05)
+        passwords.init_passwords(app)
+        passwords.hasher._slots.acquire()
+        with pytest.raises(passwords.HasherBusy):
+            passwords.hasher.verify(User.query.filter_by(username="student18").one().password, "123")
+        assert passwords.hasher.rejected == 1
+    finally:
+        from config import Config
+        app.config.update({key: getattr(Config, key) for key in (
+            "PASSWORD_HASH_METHOD", "PASSWORD_HASH_CONCURRENCY", "PASSWORD_HASH_QUEUE", "PASSWORD_HASH_WAIT")})
+        passwords.init_passwords(app)
+
+def test_read_replica_routing_and_stickiness(tmp_path):
+    from sqlalchemy import create_engine
+    from db_routing import REPLICA_BIND, ReplicaSync, sqlite_path
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer19", "employer")
+    job_id = employer.post("/api/jobs", json={"title": "Replica", "description": "d"}).get_json()["id"]
+    login_as(student, "student19", "student")
+
+    replica_path = str(tmp_path / "replica.db")
+    sync = ReplicaSync(sqlite_path(app.config["SQLALCHEMY_DATABASE_URI"]), replica_path)
+    sync.sync_once(force=True)
+    db.engines[REPLICA_BIND] = create_engine(f"sqlite:///{replica_path}")
+    try:
+        assert student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).status_code == 201
+        # студент только что писал и читает из основной базы, работодатель — с отстающей реплики
+        assert len(student.get("/api/applications").get_json()) == 1
+        assert employer.get("/api/applications").get_json() == []
+        assert sync.sync_once() and not sync.sync_once()
+        assert len(employer.get("/api/applications").get_json()) == 1
+    finally:
+        db.engines.pop(REPLICA_BIND).dispose()
+        sync.stop()
+
+def test_metrics_count_replica_statements(tmp_path):
+    from flask import Flask, g
+    import metrics
+    from db_routing import REPLICA_BIND, init_db_routing
+    other = Flask("metrics_replica")
+    other.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_READ_DATABASE_URI=f"sqlite:///{tmp_path / 'replica.db'}",
+        METRICS_ENABLED=True, METRICS_SLOW_QUERY_MS=1000)
+    init_db_routing(other)
+    db.init_app(other)
+    metrics.init_metrics(other)
+    with other.test_request_context("/api/applications"):
+        other.preprocess_request()
+        with db.engines[REPLICA_BIND].connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        assert g.metrics_sql_count == 1
+        db.session.remove()
+    with other.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app завёл общему db метаданные bind "replica": drop_all основного app их не знает
+    db.metadatas.pop(REPLICA_BIND, None)
+
+def test_dashboard_counters_and_reconcile():
+    employer = app.test_client()
+    login_as(employer, "employer20", "employer")
+    first = employer.post("/api/jobs", json={"title": "Первая", "description": "d"}).get_json()["id"]
+    second = employer.post("/api/jobs", json={"title": "Вторая", "description": "d"}).get_json()["id"]
+    app_ids = []
+    for i, job_id in enumerate((first, first, first, second)):
+        student = app.test_client()
+        login_as(student, f"student20-{i}", "student")
+        app_ids.append(student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).get_json()["application_id"])
+
+    for _ in range(2):  # повтор того же статуса счётчики не двигает
+        assert employer.put(f"/api/applications/{app_ids[0]}", json={"status": "invited"}).status_code == 200
+    employer.put("/api/applications/bulk", json=[{"id": app_ids[1], "status": "rejected"},
+                                                 {"id": app_ids[2], "status": "accepted"}])
+
+    expected = {
+        first: {"submitted": 0, "in_review": 0, "invited": 1, "rejected": 1, "accepted": 1},
+        second: {"submitted": 1, "in_review": 0, "invited": 0, "rejected": 0, "accepted": 0},
+    }
+    dashboard = employer.get("/api/dashboard").get_json()
+    assert {job["id"]: job["applications"] for job in dashboard["jobs"]} == expected
+    assert dashboard["total"] == 4 and dashboard["totals"]["submitted"] == 1
+
+    db.session.execute(db.update(Job).values(applications_submitted=99))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=["reconcile-counters"])
+    assert "расхождениями: 2" in result.output
+    dashboard = employer.get("/api/dashboard").get_json()
+    assert {job["id"]: job["applications"] for job in dashboard["jobs"]} == expected
+    assert app.test_cli_runner().invoke(args=["reconcile-counters"]).output.startswith("вакансий с расхождениями: 0")
+
+def test_job_facets_single_query_and_invalidation():
+    employer = app.test_client()
+    login_as(employer, "employer21", "employer")
+    for title, job_type in (("Python стажёр", "internship"), ("Python практика", "practice"),
+                            ("Java стажёр", "internship"), ("Python разработчик", "job")):
+        job_id = employer.post("/api/jobs", json={"title": title, "description": "d", "job_type": job_type}) \
+            .get_json()["id"]
+    employer.put(f"/api/jobs/{job_id}", json={"status": "closed"})
+
+    with count_queries() as statements:
+        body = employer.get("/api/jobs?facets=1&q=python&limit=10").get_json()
+    assert len(body["items"]) == 2 and "next_cursor" in body
+    assert body["facets"] == {"status": {"open": 2, "closed": 1}, "job_type": {"internship": 1, "practice": 1}}
+    assert sum("GROUP BY" in statement for statement in statements) == 1
+
+    # фасет status не сужается собственным фильтром, но учитывает job_type
+    body = employer.get("/api/jobs?facets=1&job_type=internship").get_json()
+    assert len(body["items"]) == 2
+    assert body["facets"] == {"status": {"open": 2}, "job_type": {"internship": 2, "practice": 1}}
+
+    # фасеты без q кэшируются, запись в вакансии сбрасывает их вместе с кэшем ответов
+    assert employer.get("/api/jobs?facets=1").get_json()["facets"]["job_type"]["practice"] == 1
+    employer.post("/api/jobs", json={"title": "Ещё практика", "description": "d", "job_type": "practice"})
+    assert employer.get("/api/jobs?facets=1&limit=1").get_json()["facets"]["job_type"]["practice"] == 2
+
+def test_archived_ids_are_not_reused():
+    from datetime import datetime, timedelta
+    from models import ArchivedJob, ArchivedApplication
+    employer, student = app.test_client(), app.test_client()
+    login_as(employer, "employer14b", "employer")
+    login_as(student, "student14b", "student")
+    long_ago = datetime.utcnow() - timedelta(days=800)
+
+    seen_jobs, seen_apps = set(), set()
+    for round_no in range(2):
+        job_id = employer.post("/api/jobs", json={"title": f"Вакансия {round_no}", "description": "d"}).get_json()["id"]
+        app_id = student.post(f"/api/jobs/{job_id}/apply", json={"resume_url": "r"}).get_json()["application_id"]
+        # строки с наибольшим id уходят в архив — следующие не должны получить те же id
+        assert job_id not in seen_jobs and app_id not in seen_apps
+        seen_jobs.add(job_id)
+        seen_apps.add(app_id)
+        employer.put(f"/api/applications/{app_id}", json={"status": "rejected"})
+        employer.put(f"/api/jobs/{job_id}", json={"status": "closed"})
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(created_at=long_ago))
+        db.session.execute(db.update(Application).where(Application.id == app_id).values(applied_at=long_ago))
+        db.session.commit()
+        result = app.test_cli_runner().invoke(args=["archive"])
+        assert result.exception is None, result.output
+
+    assert {row.id for row in ArchivedJob.query} == seen_jobs
+    assert {row.id for row in ArchivedApplication.query} == seen_apps
+
+def test_memory_response_cache_expires_stale_entries_of_other_workers():
+    import time
+    from response_cache import MemoryBackend, ResponseCache
+    # два воркера: у каждого свой кэш и свои поколения
+    worker_a, worker_b = ResponseCache(MemoryBackend(ttl=0.2)), ResponseCache(MemoryBackend(ttl=0.2))
+    data = {"version": "v1"}
+    with app.test_request_context("/api/jobs"):
+        assert worker_b.respond("jobs", ("list",), lambda: data["version"]).get_data() == b"v1"
+        data["version"] = "v2"
+        worker_a.invalidate("jobs")  # запись пришла в другой воркер
+        assert worker_b.respond("jobs", ("list",), lambda: data["version"]).get_data() == b"v1"
+        time.sleep(0.25)
+        assert worker_b.respond("jobs", ("list",), lambda: data["version"]).get_data() == b"v2"